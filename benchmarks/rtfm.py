@@ -0,0 +1,126 @@
+"""Compares the objects.inv decoder against the old line-by-line one
+
+python -m benchmarks.rtfm [path to an objects.inv]
+Downloads the Python stdlib inventory when no path is given."""
+
+import re
+import sys
+import time
+import urllib.request
+
+from ext.rtfm import SphinxObjectFileReader, parse_object_inv
+from utils.search import NgramIndex
+
+URL = "https://docs.python.org/3/objects.inv"
+
+
+class LegacyReader(SphinxObjectFileReader):
+    # The implementation this replaced, re-slices the buffer for every line
+    def read_compressed_lines(self):
+        buffer = b""
+        for chunk in self.read_compressed_chunks():
+            buffer += chunk
+            position = buffer.find(b"\n")
+            while position != -1:
+                yield buffer[:position].decode()
+                buffer = buffer[position + 1 :]
+                position = buffer.find(b"\n")
+
+
+def skip_header(stream: SphinxObjectFileReader) -> SphinxObjectFileReader:
+    for _ in range(4):
+        stream.readline()
+    return stream
+
+
+def legacy_parse(stream: LegacyReader, url: str) -> dict[str, dict[str, str]]:
+    # parse_object_inv as it was, one decode and one regex match per line
+    result = {}
+    stream.readline()
+    projname = stream.readline().rstrip()[11:]
+    stream.readline()
+    stream.readline()
+
+    entry_regex = re.compile(r"(?x)(.+?)\s+(\S*:\S*)\s+(-?\d+)\s+(\S+)\s+(.*)")
+    for line in stream.read_compressed_lines():
+        match = entry_regex.match(line.rstrip())
+        if not match:
+            continue
+
+        name, directive, _, location, dispname = match.groups()
+        domain, _, subdirective = directive.partition(":")
+        if directive == "py:module" and name in result:
+            continue
+
+        if directive == "std:doc":
+            subdirective = "label"
+
+        if location.endswith("$"):
+            location = location[:-1] + name
+
+        key = name if dispname == "-" else dispname
+        prefix = f"{subdirective}:" if domain == "std" else ""
+
+        if projname == "discord.py":
+            key = key.replace("discord.ext.commands.", "").replace("discord.", "")
+
+        result[f"{prefix}{key}"] = {
+            "url": "/".join((url, location)),
+            "type": directive.split(":")[1],
+        }
+    return result
+
+
+def bench(name: str, func, runs: int = 5) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        t = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t)
+    print(f"{name:<28} {best * 1000:>9.2f}ms  ({result})")
+    return best
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as file:
+            data = file.read()
+    else:
+        with urllib.request.urlopen(URL) as resp:
+            data = resp.read()
+    print(f"objects.inv: {len(data):,} bytes\n")
+
+    # Only worth timing if both produce the exact same entries
+    expected = legacy_parse(LegacyReader(data), "")
+    assert parse_object_inv(SphinxObjectFileReader(data), "") == expected
+
+    legacy_lines = bench(
+        "legacy lines",
+        lambda: sum(1 for _ in skip_header(LegacyReader(data)).read_compressed_lines()),
+    )
+    lines = bench(
+        "streaming lines",
+        lambda: sum(
+            1 for _ in skip_header(SphinxObjectFileReader(data)).read_compressed_lines()
+        ),
+    )
+    legacy = bench("legacy parse", lambda: len(legacy_parse(LegacyReader(data), "")))
+    parse = bench(
+        "streaming parse",
+        lambda: len(parse_object_inv(SphinxObjectFileReader(data), "")),
+    )
+    bench(
+        "parse + index",
+        lambda: len(
+            NgramIndex(parse_object_inv(SphinxObjectFileReader(data), "").items())
+        ),
+    )
+
+    print(
+        f"\nlines: {legacy_lines / lines:.1f}x faster,",
+        f"parse: {legacy / parse:.1f}x faster",
+    )
+
+
+if __name__ == "__main__":
+    main()
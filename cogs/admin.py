@@ -1,4 +1,7 @@
+import asyncio
+import datetime
 import difflib
+import pathlib
 import time
 from typing import TYPE_CHECKING, Annotated, Any, Literal, Optional, Union
 
@@ -7,7 +10,7 @@ from discord import app_commands
 from discord.ext import commands
 from tabulate import tabulate
 
-from utils import misc, subclasses
+from utils import database, misc, subclasses
 from utils.errors import NotYourButton
 
 from . import EXTENSIONS
@@ -15,6 +18,8 @@ from . import EXTENSIONS
 if TYPE_CHECKING:
     from main import AceBot
 
+directory = pathlib.Path(__file__).parent.parent / "cache"
+
 
 class Admin(subclasses.Cog):
     def __init__(self, bot: "AceBot"):
@@ -548,6 +553,10 @@ class Admin(subclasses.Cog):
             r = await conn.fetchall(command) or await conn.execute(command)
             await conn.commit()
 
+            # Raw writes bypass the settings cache
+            if "guildconfig" in command.casefold():
+                self.bot.guild_config.invalidate()
+
             if isinstance(r, list):
                 embed = discord.Embed(
                     description=f"```\n{tabulate(headers=r[0].keys(), tabular_data=r)}```"
@@ -562,6 +571,123 @@ class Admin(subclasses.Cog):
                 mention_author=False,
             )
 
+    @commands.is_owner()
+    @commands.command(name="database", aliases=["pragmas", "db"])
+    async def database_info(self, ctx: commands.Context):
+        """Shows the SQLite pragmas in effect on pooled connections"""
+        async with self.bot.pool.acquire() as conn:
+            effective = await database.effective_pragmas(conn)
+
+        rows = [
+            [pragma, self.bot.pragmas[pragma], value]
+            for pragma, value in effective.items()
+        ]
+        embed = discord.Embed(
+            title="\N{FILE CABINET} Database",
+            description=f"```\n{tabulate(rows, headers=['pragma', 'configured', 'effective'])}```",
+            color=discord.Color.blurple(),
+        )
+        await ctx.reply(embed=embed, mention_author=False)
+
+    @commands.is_owner()
+    @commands.command(name="metrics", aliases=["perf"])
+    async def command_metrics(
+        self, ctx: commands.Context, option: Optional[Literal["export", "reset"]] = None
+    ):
+        """Command latencies in ms, slowest first
+        `export` sends every histogram as a JSON file, `reset` starts over"""
+        metrics = self.bot.metrics
+        if option == "reset":
+            metrics.reset()
+            return await ctx.reply("Metrics reset !", mention_author=False)
+
+        if option == "export":
+            directory.mkdir(exist_ok=True)
+            path = directory / f"metrics-{int(time.time())}.json"
+            await asyncio.to_thread(metrics.export, path)
+            return await ctx.reply(file=discord.File(path), mention_author=False)
+
+        rows = [
+            [
+                command,
+                phases["total"].count,
+                metrics.failures.get(command, 0),
+                *(f"{phases['total'].percentile(p):.1f}" for p in (50, 95, 99)),
+                *(
+                    f"{phases[phase].percentile(95):.1f}"
+                    for phase in ("prepare", "db", "http")
+                ),
+            ]
+            for command, phases in sorted(
+                metrics.commands.items(),
+                key=lambda c: c[1]["total"].percentile(95),
+                reverse=True,
+            )[:15]
+        ]
+        headers = ["command", "n", "fail", "p50", "p95", "p99"]
+        headers += ["prep95", "db95", "http95"]
+        embed = discord.Embed(
+            title="\N{STOPWATCH} Command latency",
+            description=f"```\n{tabulate(rows, headers=headers)}```",
+            color=discord.Color.blurple(),
+        )
+        executor = self.bot.executor
+        embed.add_field(
+            name=f"Eval ({executor.backend.name})",
+            value=(
+                f"{misc.space}queue wait p50/p95: `{executor.queue_wait.percentile(50):.0f}`"
+                f"/`{executor.queue_wait.percentile(95):.0f}ms`\n"
+                f"{misc.space}execution p50/p95: `{executor.execution.percentile(50):.0f}`"
+                f"/`{executor.execution.percentile(95):.0f}ms`\n"
+                f"{misc.space}cache hits: `{executor.hits}`/`{executor.hits + executor.misses}`"
+            ),
+        )
+        embed.set_footer(
+            text=f"Since {misc.time_format(time.time() - metrics.since)} ago"
+        )
+        await ctx.reply(embed=embed, mention_author=False)
+
+    @commands.is_owner()
+    @commands.command(name="lag", aliases=["loop"])
+    async def loop_lag(self, ctx: commands.Context, index: Optional[int] = None):
+        """Event loop lag and the latest times it got blocked
+        Give the index of one of them to see its full stack"""
+        monitor = self.bot.loop_monitor
+        slow = list(reversed(monitor.slow))
+
+        if index is not None:
+            if not 0 < index <= len(slow):
+                return await ctx.reply("No such entry", mention_author=False)
+            entry = slow[index - 1]
+            stack = "".join(entry.stack)[-3900:]
+            embed = discord.Embed(
+                title=f"Blocked for {entry.duration:.0f}ms in {entry.task}",
+                description=f"```py\n{stack}```",
+                color=discord.Color.red(),
+                timestamp=datetime.datetime.fromtimestamp(entry.when, datetime.UTC),
+            )
+            return await ctx.reply(embed=embed, mention_author=False)
+
+        rows = [
+            ["recent", *(f"{monitor.percentile(p):.1f}" for p in (50, 95, 99))],
+            ["overall", *(f"{monitor.lag.percentile(p):.1f}" for p in (50, 95, 99))],
+        ]
+        embed = discord.Embed(
+            title="\N{STOPWATCH} Event loop lag",
+            description=f"```\n{tabulate(rows, headers=['ms', 'p50', 'p95', 'p99'])}```",
+            color=discord.Color.blurple(),
+        )
+        for i, entry in enumerate(slow[:10], start=1):
+            # Innermost frame, most likely where the time went
+            where = entry.stack[-1].strip().splitlines()[0] if entry.stack else "?"
+            embed.add_field(
+                name=f"{i}. {entry.duration:.0f}ms <t:{int(entry.when)}:R>",
+                value=f"{misc.curve} {entry.task}\n`{where[:200]}`",
+                inline=False,
+            )
+        embed.set_footer(text=f"Blocked {monitor.blocked} times since startup")
+        await ctx.reply(embed=embed, mention_author=False)
+
     @commands.command(
         aliases=[
             "killyourself",
@@ -673,6 +799,7 @@ class Admin(subclasses.Cog):
                     synced = []
                 case _:
                     synced = await ctx.bot.tree.sync()
+                    self.bot.app_registry.update(synced)
 
             await ctx.reply(
                 f"Synced {len(synced)} commands {'globally' if spec is None else 'to the current guild.'}",
@@ -725,31 +852,15 @@ class Admin(subclasses.Cog):
             config = {
                 _name: _setting.default for _name, _setting in module.config.items()
             }
-            async with self.bot.pool.acquire() as conn:
-                if not setting:
-                    config.update(
-                        {
-                            row[0].split(":")[1]: row[1]
-                            for row in await conn.fetchall(
-                                "SELECT key, value FROM guildConfig WHERE key LIKE :key AND id = :id;",
-                                {
-                                    "id": ctx.guild.id,
-                                    "key": f"{module.qualified_name}:%",
-                                },
-                            )
-                        }
-                    )
-                else:
-                    config = {
-                        row[0].split(":")[1]: row[1]
-                        for row in await conn.fetchall(
-                            "SELECT key, value FROM guildConfig WHERE key LIKE :key AND id = :id;",
-                            {
-                                "id": ctx.guild.id,
-                                "key": f"{module.qualified_name}:{setting}",
-                            },
-                        )
-                    }
+            stored = await self.bot.guild_config.module(
+                ctx.guild.id, module.qualified_name
+            )
+            if not setting:
+                config.update(stored)
+            else:
+                config = (
+                    {setting: stored.get(setting)} if setting in module.config else {}
+                )
 
             embed = discord.Embed(
                 title=f"\N{GEAR}\N{VARIATION SELECTOR-16} Config for {module.qualified_name}",
@@ -766,35 +877,21 @@ class Admin(subclasses.Cog):
             return await ctx.reply(embed=embed, mention_author=False)
 
         ## Set config
-        async with self.bot.pool.acquire() as conn:
-            if value.casefold() in {"none", "false", "no", "0"}:
-                await conn.execute(
-                    "DELETE FROM guildConfig WHERE key = :key AND id = :id;",
-                    {"key": f"{module.qualified_name}:{setting}", "id": ctx.guild.id},
-                )
-                value = None
-            else:
-                # Convert value
-                value: module.config[setting].annotation = (
-                    await commands.run_converters(
-                        ctx,
-                        module.config[setting].annotation,
-                        value,
-                        commands.Parameter,
-                    )
-                )
+        if value.casefold() in {"none", "false", "no", "0"}:
+            value = None
+        else:
+            # Convert value
+            value: module.config[setting].annotation = await commands.run_converters(
+                ctx,
+                module.config[setting].annotation,
+                value,
+                commands.Parameter,
+            )
 
-                # Get id incase its a discord object
-                value = getattr(value, "id", value)
+            # Get id incase its a discord object
+            value = getattr(value, "id", value)
 
-                await conn.execute(
-                    "INSERT INTO guildConfig (id, key, value) VALUES (:id, :key, :value) ON CONFLICT(id, key) DO UPDATE SET value = :value;",
-                    {
-                        "id": ctx.guild.id,
-                        "key": f"{module.qualified_name}:{setting}",
-                        "value": value,
-                    },
-                )
+        await module.set_setting(ctx.guild.id, setting, value)
 
         embed = discord.Embed(
             title=f"\N{GEAR}\N{VARIATION SELECTOR-16} Updated config for {module.qualified_name}",
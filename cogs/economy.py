@@ -1,36 +1,124 @@
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Dict, Optional
 
 import discord
 from discord.ext import commands
 
-from utils import subclasses
+from utils import errors, subclasses
 
 if TYPE_CHECKING:
     from main import AceBot
 
 
+STARTING_BALANCE = 20
+
+# Accounts are created on their first write, an absent row holds STARTING_BALANCE
+CREDIT = "INSERT INTO economy (id, money) VALUES (:account, :start + :amount) ON CONFLICT(id) DO UPDATE SET money = money + :amount RETURNING money;"
+DEBIT = "INSERT INTO economy (id, money) SELECT :account, :start - :amount WHERE :start >= :amount OR EXISTS (SELECT 1 FROM economy WHERE id = :account) ON CONFLICT(id) DO UPDATE SET money = money - :amount WHERE money >= :amount RETURNING money;"
+LEDGER = "INSERT INTO transactions (sender, receiver, amount, reason) VALUES (?, ?, ?, ?);"
+
+
 class Bank:
     @classmethod
-    async def set_wallet(cls, bot: "AceBot", account: int, amount: int) -> None:
+    async def get_wallet(cls, bot: "AceBot", account: int) -> int:
         async with bot.pool.acquire() as conn:
-            await conn.execute(
-                "UPDATE economy SET money = :amount WHERE id = :account;",
-                {"amount": amount, "account": account},
+            row = await conn.fetchone(
+                "SELECT money FROM economy WHERE id = ?;", (account,)
             )
+            return row[0] if row else STARTING_BALANCE
 
     @classmethod
-    async def get_wallet(cls, bot: "AceBot", account: int) -> int:
+    async def credit(
+        cls, bot: "AceBot", account: int, amount: int, reason: Optional[str] = None
+    ) -> int:
+        """Adds money to an account, returns the new balance"""
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+
         async with bot.pool.acquire() as conn:
-            existing_account = await conn.fetchone(
-                "SELECT * FROM economy WHERE id = :account;", {"account": account}
-            )
-            if not existing_account:
-                await conn.execute(
-                    "INSERT INTO economy (id, money) VALUES (:account, :default);",
-                    {"account": account, "default": 20},
+            async with conn.transaction():
+                row = await conn.fetchone(
+                    CREDIT,
+                    {"account": account, "amount": amount, "start": STARTING_BALANCE},
+                )
+                await conn.execute(LEDGER, (None, account, amount, reason))
+        return row[0]
+
+    @classmethod
+    async def debit(
+        cls, bot: "AceBot", account: int, amount: int, reason: Optional[str] = None
+    ) -> int:
+        """Removes money from an account, returns the new balance
+        Raises `InsufficientFunds` if the balance is too low"""
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+
+        async with bot.pool.acquire() as conn:
+            async with conn.transaction():
+                row = await conn.fetchone(
+                    DEBIT,
+                    {"account": account, "amount": amount, "start": STARTING_BALANCE},
+                )
+                if row is None:
+                    raise errors.InsufficientFunds(account, amount)
+                await conn.execute(LEDGER, (account, None, amount, reason))
+        return row[0]
+
+    @classmethod
+    async def transfer(
+        cls,
+        bot: "AceBot",
+        sender: int,
+        receiver: int,
+        amount: int,
+        reason: Optional[str] = None,
+    ) -> tuple[int, int]:
+        """Moves money between two accounts atomically, returns both new balances
+        Raises `InsufficientFunds` if the sender can't afford it"""
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        if sender == receiver:
+            raise ValueError("cannot transfer to the same account")
+
+        async with bot.pool.acquire() as conn:
+            async with conn.transaction():
+                debited = await conn.fetchone(
+                    DEBIT,
+                    {"account": sender, "amount": amount, "start": STARTING_BALANCE},
+                )
+                if debited is None:
+                    raise errors.InsufficientFunds(sender, amount)
+                credited = await conn.fetchone(
+                    CREDIT,
+                    {"account": receiver, "amount": amount, "start": STARTING_BALANCE},
+                )
+                await conn.execute(LEDGER, (sender, receiver, amount, reason))
+        return debited[0], credited[0]
+
+    @classmethod
+    async def bulk_credit(
+        cls, bot: "AceBot", payouts: Dict[int, int], reason: Optional[str] = None
+    ) -> None:
+        """Pays many accounts in a single transaction, e.g. every player of a game"""
+        payouts = {acc: amount for acc, amount in payouts.items() if amount > 0}
+        if not payouts:
+            return
+
+        async with bot.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(
+                    CREDIT,
+                    [
+                        {"account": acc, "amount": amount, "start": STARTING_BALANCE}
+                        for acc, amount in payouts.items()
+                    ],
+                )
+                await conn.executemany(
+                    LEDGER,
+                    [
+                        (None, account, amount, reason)
+                        for account, amount in payouts.items()
+                    ],
                 )
-                return 20
-            return existing_account[1]
 
 
 class Economy(subclasses.Cog):
@@ -50,18 +138,20 @@ class Economy(subclasses.Cog):
         """Checks your current balance or another member's"""
         member_id = member.id if member else ctx.message.author.id
 
-        # Get account, if doesn't exist, create one
-        balance = await Bank.get_wallet(self.bot, member_id)
-
         if amount:
-            if await self.bot.is_owner(ctx.message.author):
-                await Bank.set_wallet(self.bot, member_id, balance + amount)
-                await ctx.send(
-                    f"{abs(amount):,}$ was {'added to' if amount >= 0 else 'removed from'} your balance ({balance:,}$ -> {balance + amount:,}$)"
-                )
-            else:
+            if not await self.bot.is_owner(ctx.message.author):
                 raise commands.NotOwner()
+
+            if amount >= 0:
+                balance = await Bank.credit(self.bot, member_id, amount, reason="owner")
+            else:
+                balance = await Bank.debit(self.bot, member_id, -amount, reason="owner")
+
+            await ctx.send(
+                f"{abs(amount):,}$ was {'added to' if amount >= 0 else 'removed from'} your balance ({balance - amount:,}$ -> {balance:,}$)"
+            )
         else:
+            balance = await Bank.get_wallet(self.bot, member_id)
             await ctx.send(f"You have currently {balance:,}$")
 
 
@@ -1,4 +1,3 @@
-import difflib
 import traceback
 from typing import TYPE_CHECKING, Union
 
@@ -18,36 +17,20 @@ async def reinvoke(ctx: commands.Context):
     command = ctx.message.content.split()[0].strip(ctx.prefix)
 
     # Get closest match for command
-    correct_command: Union[commands.Command, commands.Group] = None
-    ratio: float = 0.5
-    cmd: commands.Command
-    for cmd in ctx.bot.commands:
-        try:
-            await cmd.can_run(ctx)
-            r = difflib.SequenceMatcher(None, command, cmd.qualified_name).ratio()
-            if r > ratio:
-                correct_command = cmd
-                ratio = r
-        except:
-            pass
-
+    correct_command: Union[commands.Command, commands.Group] = (
+        await ctx.bot.command_index.suggest(ctx, command)
+    )
     if not correct_command:
         return
 
     # Is commands a group?
-    if hasattr(correct_command, "commands"):
-        command = ctx.message.content.split()
-        command = (
-            " ".join(command[:2]).strip(ctx.prefix)
-            if len(command) > 1
-            else command[0].strip(ctx.prefix)
-        )
-        ratio: float = 0.75
-        for cmd in correct_command.commands:
-            r = difflib.SequenceMatcher(None, command, cmd.qualified_name).ratio()
-            if r > ratio:
-                correct_command = cmd
-                ratio = r
+    if isinstance(correct_command, commands.Group):
+        words = ctx.message.content.split()
+        if len(words) > 1:
+            subcommand = await ctx.bot.command_index.suggest(
+                ctx, words[1], parent=correct_command, threshold=0.6
+            )
+            correct_command = subcommand or correct_command
 
     # Invoke command
     async def invoke(interaction: discord.Interaction):
@@ -176,6 +159,51 @@ async def on_command_error(ctx: commands.Context, error: commands.CommandError):
             )
             return await ctx.reply(embed=embed, delete_after=15, mention_author=False)
 
+    # Raised from within commands, so usually wrapped in CommandInvokeError
+    if iserror(getattr(error, "original", error), errors.InsufficientFunds):
+        funds = getattr(error, "original", error)
+        return await ctx.reply(
+            embed=discord.Embed(
+                title=":coin: Insufficient funds",
+                description=f"> <@{funds.account}> cannot afford `{funds.amount:,}$`",
+            ),
+            mention_author=False,
+            delete_after=15,
+        )
+
+    if iserror(getattr(error, "original", error), errors.EvalUnavailable):
+        unavailable = getattr(error, "original", error)
+        return await ctx.reply(
+            embed=discord.Embed(
+                title=":warning: Could not run code",
+                description=f"> The `{unavailable.backend}` runner is unavailable right now, try again later",
+            ),
+            mention_author=False,
+            delete_after=15,
+        )
+
+    if iserror(getattr(error, "original", error), errors.EvalRejected):
+        rejected = getattr(error, "original", error)
+        return await ctx.reply(
+            embed=discord.Embed(
+                title=":warning: Could not run code",
+                description=f"> The `{rejected.backend}` runner refused it: {rejected.reason}",
+            ),
+            mention_author=False,
+            delete_after=15,
+        )
+
+    if iserror(getattr(error, "original", error), errors.TooManyEvals):
+        evals = getattr(error, "original", error)
+        return await ctx.reply(
+            embed=discord.Embed(
+                title=":hourglass: Slow down",
+                description=f"> You already have `{evals.limit}` evals waiting",
+            ),
+            mention_author=False,
+            delete_after=15,
+        )
+
     if iserror(error, errors.ModuleDisabled):
         return await ctx.reply(
             embed=discord.Embed(
@@ -211,10 +239,13 @@ async def on_command_error(ctx: commands.Context, error: commands.CommandError):
     prefix = f"```py\n"
     if len(prefix + trace) > 1024:
         p = paginator.Paginator(
-            ctx, embed=embed, prefix=prefix, suffix="```", subtitle="Traceback"
+            ctx,
+            embed=embed,
+            prefix=prefix,
+            suffix="```",
+            subtitle="Traceback",
+            lines=paginator.split_lines(misc.clean_traceback(trace)),
         )
-        for line in misc.clean_traceback(trace).split("\n"):
-            p.add_line(line)
 
         # Send full traceback to owner
         await p.start(destination=ctx.bot.get_user(ctx.bot.owner_id))
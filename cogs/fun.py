@@ -1,23 +1,18 @@
-import json
-import pathlib
+import asyncio
 import re
 import time
 import datetime
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING
 
 import discord
 from discord.ext import commands
 
-from games import CountryGuesser
+from games import CountryGuesser, countries
 from utils import misc, subclasses
 
 if TYPE_CHECKING:
     from main import AceBot
 
-directory = pathlib.Path(__file__).parent.parent  # ace-of-spades folder
-
-TLD_REGEX = re.compile(r"^\.?([A-z]{2})$")
-
 UTC_OFFSET_REGEX = re.compile(r"(?:UTC)?([+-])0*([0-9]*):0*([0-9]*)") 
 
 TIME_FORMAT = "%I:%M %p"   # 12-hour time format 
@@ -29,6 +24,10 @@ class Fun(subclasses.Cog):
             emoji="\N{JIGSAW PUZZLE PIECE}",
         )
 
+    async def cog_load(self):
+        # Parsed once here so games and cwiki never touch the file
+        await asyncio.to_thread(countries.get)
+
     @commands.group(invoke_without_command=True)
     async def games(self, ctx: commands.Context):
         embed = discord.Embed(
@@ -57,7 +56,8 @@ class Fun(subclasses.Cog):
         if _id not in self.bot.games.keys():
             return await ctx.reply("Game not found !", delete_after=5, mention_author=False)
 
-        self.bot.games.pop(_id)
+        game = self.bot.games.pop(_id)
+        self.bot.game_router.unregister(game)
         return await ctx.reply(f"Deleted game `{gameid}`", delete_after=15, mention_author=False)
 
     @commands.hybrid_command(aliases=["country", "cgssr"], invoke_without_command=True)
@@ -69,9 +69,6 @@ class Fun(subclasses.Cog):
     @commands.hybrid_command()
     async def cwiki(self, ctx: commands.Context, *, country: str):
         """Wiki for countries"""
-        with open(directory / "games" / "countries.json", "r") as file:
-            data: dict[str, Any] = json.load(file)
-
         def localize_tz(offset: str) -> str:
             """A hard-coded function to only on fixed type of string format
             Takes a utc_offset string as input (example: "UTC+08:30") and returns the corresponding time to the offset -> 12:24 PM 
@@ -86,95 +83,56 @@ class Fun(subclasses.Cog):
             return localized.strftime(TIME_FORMAT)
 
         async with ctx.channel.typing():
-            matched = None
-            tld = TLD_REGEX.sub(r"\g<1>", country)
-
-            for country_dict in data:
-                if (
-                    country.casefold()
-                    in (
-                        country_dict["name"]["common"].casefold(),
-                        country_dict["cca3"].casefold(),
-                    )
-                    or tld.casefold() == country_dict["cca2"].casefold()
-                ):
-                    matched = country_dict
-                    break
-
+            matched = countries.get().find(country)
             if matched is None:
                 return await ctx.reply(content=f"No result found for `{country}`.", delete_after=5, mention_author=False)
 
             country = matched
-            native_names = (
-                "native names: `"
-                + "` | `".join(
-                    list(
-                        {
-                            country["name"]["nativeName"][lang]["official"]
-                            for lang in country["name"]["nativeName"].keys()
-                        }
-                    )
-                )
-                + "`"
-            )
-            languages = (
-                "languages: `"
-                + "` | `".join(
-                    list(
-                        {
-                            country["languages"][lang]
-                            for lang in country["languages"].keys()
-                        }
-                    )
-                )
-                + "`"
-            )
-            capital = (
-                f"capital: `{country['capital'][0]}`"
-                if country.get("capital", None)
-                else None
-            )
-            
-            tzs = list(set((country['timezones'][0], country['timezones'][-1])))
+
+            native_names = "native names: `" + "` | `".join(country.native_names) + "`"
+            languages = "languages: `" + "` | `".join(country.languages) + "`"
+            capital = f"capital: `{country.capital}`"
+
+            tzs = list(set((country.timezones[0], country.timezones[-1])))
             tzf = len(tzs) > 1
             local_time = list(map(localize_tz, tzs))
             ltf = len(local_time) > 1
 
             geo = [
                 (
-                    f"region: `{country['subregion']}` ({country['region']})"
-                    if country.get("subregion")
-                    else f"region: `{country['region']}`"
+                    f"region: `{country.subregion}` ({country.region})"
+                    if country.subregion
+                    else f"region: `{country.region}`"
                 ),
                 f"timezone{'s'*tzf}: `{tzs[0]}` {f'to `{tzs[-1]}`'*tzf}",
                 f"Local time: `{local_time[0]}` {f'to `{local_time[-1]}`'*ltf}",
-                f"area: `{int(country['area']):,} km²`",
+                f"area: `{int(country.area):,} km²`",
             ]
 
             gini = (
-                f"gini index: `{list(country['gini'].values())[0]}` ({list(country['gini'])[0]})"
-                if country.get("gini", None)
+                f"gini index: `{country.gini[1]}` ({country.gini[0]})"
+                if country.gini
                 else None
             )
 
             currency = (
-                f"currency: `{country['currencies'][list(country['currencies'])[0]]['name']}` ({country['currencies'][list(country['currencies'])[0]]['symbol']})"
-                if country.get("currencies", None)
+                f"currency: `{country.currency[0]}` ({country.currency[1]})"
+                if country.currency
                 else None
             )
 
             embed = discord.Embed(
-                title=f"{misc.info} {country['name']['official']}",
-                description=f"{misc.curve} [view on map]({country['maps']['googleMaps']}) | [view on stree view]({country['maps']['openStreetMaps']})",
+                title=f"{misc.info} {country.names[1]}",
+                description=f"{misc.curve} [view on map]({country.maps[0]}) | [view on stree view]({country.maps[1]})",
             )
-            embed.set_thumbnail(url=country["flags"]["png"])
+            embed.set_thumbnail(url=country.flag)
 
             embed.add_field(
                 name="Endonyms",
                 value=(
                     f"{misc.space}{native_names}\n"
                     f"{misc.space}{languages}\n"
-                    f'{misc.space}{capital or "capital: `Unknown`"}'
+                    f"{misc.space}{capital}"
                 ),
                 inline=False,
             )
@@ -196,10 +154,10 @@ class Fun(subclasses.Cog):
                 value=misc.space
                 + f"\n{misc.space}".join(
                     [
-                        f"M: {country['demonyms'][lang]['m']} (`{lang.upper()}`)\n{misc.space}W: {country['demonyms'][lang]['f']} (`{lang.upper()}`)\n"
-                        for lang in country["demonyms"].keys()
-                        if country["demonyms"][lang]["m"]
-                        and country["demonyms"][lang]["f"]
+                        f"M: {country.people[lang]['m']} (`{lang.upper()}`)\n{misc.space}W: {country.people[lang]['f']} (`{lang.upper()}`)\n"
+                        for lang in country.people.keys()
+                        if country.people[lang]["m"]
+                        and country.people[lang]["f"]
                     ]
                     or ["demonyms: `Unknown`"]
                 ),
@@ -207,7 +165,7 @@ class Fun(subclasses.Cog):
             )
             embed.add_field(
                 name="Population",
-                value=f"{misc.space}population: `{country['population']:,}` habitants",
+                value=f"{misc.space}population: `{country.population:,}` habitants",
                 inline=False,
             )
 
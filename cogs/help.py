@@ -1,5 +1,6 @@
 import textwrap
-from typing import TYPE_CHECKING, List
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Tuple
 
 import discord
 from discord import app_commands
@@ -11,6 +12,8 @@ from utils.dynamic import QuitButton
 if TYPE_CHECKING:
     from main import AceBot
 
+PAGES_CACHE_SIZE = 32
+
 
 async def filter_commands(
     ctx: commands.Context, commands: list[commands.Command], show_hidden: bool = False
@@ -26,10 +29,16 @@ async def filter_commands(
 
 
 class HelpView(subclasses.View):
-    def __init__(self, bot: "AceBot", ctx: commands.Context):
+    def __init__(
+        self,
+        bot: "AceBot",
+        ctx: commands.Context,
+        pages: "OrderedDict[Tuple[bool, bool, int], discord.Embed]",
+    ):
         super().__init__()
         self.bot = bot
         self.ctx = ctx
+        self.pages = pages
 
     def welcome_page(self) -> discord.Embed:
         # METHOD.chain().chain().chain()...
@@ -58,6 +67,23 @@ class HelpView(subclasses.View):
         return embed
 
     async def commands_page(self) -> discord.Embed:
+        # can_run only depends on these, so everyone sharing them gets the same page
+        key = (
+            self.ctx.guild is not None,
+            await self.bot.is_owner(self.ctx.author),
+            self.ctx.permissions.value,
+        )
+        embed = self.pages.get(key)
+        if embed is not None:
+            self.pages.move_to_end(key)
+            return embed
+
+        embed = self.pages[key] = await self.render_commands_page()
+        if len(self.pages) > PAGES_CACHE_SIZE:
+            self.pages.popitem(last=False)
+        return embed
+
+    async def render_commands_page(self) -> discord.Embed:
         embed = discord.Embed(color=discord.Color.blurple())
 
         # Modules & Commands
@@ -128,12 +154,18 @@ class HelpView(subclasses.View):
 class HelpCog(subclasses.Cog):
     def __init__(self, bot: commands.Bot | None = None, emoji: str | None = None):
         super().__init__(bot, emoji)
+        # (in guild, is owner, channel permissions) -> rendered commands page
+        self.pages: OrderedDict[Tuple[bool, bool, int], discord.Embed] = OrderedDict()
+
+    @commands.Cog.listener()
+    async def on_extension_update(self, name: str):
+        self.pages.clear()
 
     @commands.hybrid_command(name="help", aliases=["h"], hidden=True)
     @app_commands.describe(entity="The command you need help with")
     async def _help(self, ctx: commands.Context, *, entity: str = None):
         """Perhaps you do not know how to use this bot?"""
-        view = HelpView(self.bot, ctx)
+        view = HelpView(self.bot, ctx, self.pages)
 
         if not entity:
             view.add_item(QuitButton(author=ctx.author, guild=ctx.guild))
@@ -171,14 +203,11 @@ class HelpCog(subclasses.Cog):
 
         ## App command version
         if isinstance(command, commands.HybridCommand):
-            app_cmds: list[app_commands.AppCommand] = (
-                await self.bot.tree.fetch_commands()
-            )
-            for cmd in app_cmds:
-                if cmd.name == command.qualified_name:
-                    embed.add_field(
-                        name="App command", value=f"{misc.curve} {cmd.mention}"
-                    )
+            cmd = await self.bot.app_registry.get(command.qualified_name)
+            if cmd:
+                embed.add_field(
+                    name="App command", value=f"{misc.curve} {cmd.mention}"
+                )
 
         ## Authorization
         mentions = [ctx.author.mention if not ctx.guild else "@everyone"]
@@ -1,4 +1,3 @@
-import textwrap
 from typing import TYPE_CHECKING, Union, cast
 
 import discord
@@ -6,7 +5,8 @@ import wavelink
 from discord import app_commands
 from discord.ext import commands
 
-from utils import errors, misc, paginator, subclasses
+from ext import musicqueue
+from utils import errors, misc, subclasses
 
 if TYPE_CHECKING:
     from main import AceBot
@@ -126,30 +126,14 @@ class Music(subclasses.Cog):
     async def on_wavelink_track_start(
         self, payload: wavelink.TrackStartEventPayload
     ) -> None:
-        async with self.bot.pool.acquire() as conn:
-            is_silent: bool = await conn.fetchone(
-                "SELECT value FROM guildConfig WHERE id = ? AND key = 'silent';",
-                (payload.player.guild.id),
-            )
+        is_silent: bool = await self.get_setting(payload.player.guild.id, "silent")
 
-            # +1 song played
-            await conn.execute(
-                "INSERT INTO statistics (id, key, value) VALUES (?, ?, 1) ON CONFLICT(id, key) DO UPDATE SET value = value + 1;",
-                (
-                    payload.player.guild.id,
-                    "SONG_PLAYED",
-                ),
-            )
-            # add length of track
-            await conn.execute(
-                "INSERT INTO statistics (id, key, value) VALUES (:id, :key, :value) ON CONFLICT(id, key) DO UPDATE SET value = value + :value;",
-                {
-                    "id": payload.player.guild.id,
-                    "key": "SONG_PLAYTIME",
-                    "value": payload.track.length // 1000,
-                },
-            )
-            await conn.commit()
+        # +1 song played
+        self.bot.stats.increment(payload.player.guild.id, "SONG_PLAYED")
+        # add length of track
+        self.bot.stats.increment(
+            payload.player.guild.id, "SONG_PLAYTIME", payload.track.length // 1000
+        )
 
         if not is_silent:
             return await self.now_playing_logic(payload)
@@ -203,7 +187,7 @@ class Music(subclasses.Cog):
         player = cast(wavelink.Player, ctx.voice_client)
         if not player:
             try:
-                player = await ctx.author.voice.channel.connect(cls=wavelink.Player)  # type: ignore
+                player = await ctx.author.voice.channel.connect(cls=musicqueue.Player)  # type: ignore
             except AttributeError:
                 raise errors.NoVoiceFound
             except discord.ClientException:
@@ -305,35 +289,8 @@ class Music(subclasses.Cog):
         if not player:
             raise errors.NoVoiceFound
 
-        length = len(player.queue._items + player.auto_queue._items)
-        if length > 0:
-            p = paginator.Paginator(
-                ctx=ctx,
-                embed=discord.Embed(
-                    title=f"Queue ({str(length) + ' songs' if length > 1 else str(length) + ' song'})",
-                    color=discord.Color.blurple(),
-                ),
-                max_lines=20,
-            )
-            items = [
-                [
-                    format(i + 1, "02d"),
-                    textwrap.shorten(
-                        track.title.replace("[", "(").replace("]", ")"),
-                        45,
-                        break_long_words=False,
-                        placeholder="...",
-                    ),
-                    track.uri,
-                ]
-                for i, track in enumerate(
-                    player.queue._items + player.auto_queue._items
-                )
-            ]
-            for item in items:
-                p.add_line(f"`{item[0]}` | [`{item[1]}`]({item[2]})")
-
-            await p.start()
+        if player.queue or player.auto_queue:
+            await musicqueue.QueueView(ctx, player).start()
         else:
             await ctx.reply("Queue empty !", mention_author=False, delete_after=5)
 
@@ -433,21 +390,8 @@ class Music(subclasses.Cog):
     async def shutup(self, ctx: commands.Context):
         """Makes the bot stop announcing every song
         Preferably use `nowplaying` to see what the bot is singing"""
-        async with self.bot.pool.acquire() as conn:
-            is_silent = await conn.fetchone(
-                "SELECT value FROM guildConfig WHERE id = ? AND key = 'silent';",
-                (ctx.guild.id),
-            )
-
-            if is_silent:
-                await conn.execute("DELETE FROM guildConfig WHERE key = 'silent';")
-            else:
-                await conn.execute(
-                    "INSERT INTO guildConfig (id, key, value) VALUES (:id, 'silent', :value);",
-                    {"id": ctx.guild.id, "value": True},
-                )
-
-            await conn.commit()
+        is_silent = await self.get_setting(ctx.guild.id, "silent")
+        await self.set_setting(ctx.guild.id, "silent", None if is_silent else True)
 
         if not ctx.interaction:
             if not is_silent:
@@ -7,10 +7,10 @@ from typing import TYPE_CHECKING, Literal, Optional
 
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 from ext import embedbuilder, info, rtfm
-from utils import misc, subclasses
+from utils import errors, misc, subclasses
 
 if TYPE_CHECKING:
     from main import AceBot
@@ -26,6 +26,21 @@ class Utility(subclasses.Cog):
             emoji="\N{HAMMER AND WRENCH}",
         )
 
+    async def cog_load(self):
+        self.revalidate_rtfm.start()
+
+    async def cog_unload(self):
+        self.revalidate_rtfm.cancel()
+
+    @tasks.loop(hours=12)
+    async def revalidate_rtfm(self):
+        # Conditional requests, unchanged inventories cost a 304 and no parsing
+        await rtfm.build_rtfm_table(self.bot.session)
+
+    @revalidate_rtfm.before_loop
+    async def load_rtfm(self):
+        await rtfm.load_rtfm_table()
+
     @commands.hybrid_command(aliases=["char", "character"])
     @app_commands.describe(characters="The characters to get info on")
     async def charinfo(self, ctx: commands.Context, *, characters: str):
@@ -133,27 +148,30 @@ class Utility(subclasses.Cog):
         body: str,
     ):
         """Runs code in the specified language, aliases work too !"""
+        backend = self.bot.executor.backend
+        if not backend.public and not await self.bot.is_owner(ctx.author):
+            raise errors.EvalRejected(backend.name, "only the owner may run code here")
 
         # Get language
-        if not language in misc.literal_runtimes:
+        runtime = await backend.get(language) if language else None
+        if not runtime:
             language = (
                 language + " " if language else ""
             )  # Fix language being none in some cases
             body = language + body
-            language = "python"
+            runtime = await backend.get("python")
+
+        if not runtime:
+            return await ctx.reply(
+                "Could not find a runtime, try again later.",
+                delete_after=5,
+                mention_author=False,
+            )
+        language = runtime
 
         # Clean body
         body = misc.clean_codeblock(body)
 
-        # Convert language
-        for r in misc.runtimes:
-            if (
-                language.casefold() == r["language"]
-                or language.casefold() in r["aliases"]
-            ):
-                language = r
-                break
-
         # Format code if python
         if language["language"] == "python":
             code = "import asyncio\nasync def func():\n"
@@ -194,18 +212,10 @@ class Utility(subclasses.Cog):
         #         "asyncio.run(func())"            
         #     )
 
-        payload = {
-            "language": language["language"],
-            "version": language["version"],
-            "files": [{"content": body}],
-        }
-        response = await (
-            await self.bot.session.post(
-                "https://emkc.org/api/v2/piston/execute", data=json.dumps(payload)
-            )
-        ).json()
-
-        output = response["run"]["output"] or "No output"
+        run = await self.bot.executor.execute(
+            ctx.author.id, language["language"], language["version"], body
+        )
+        output = run["output"] or "No output"
 
         await subclasses.reply(
             ctx,
@@ -215,7 +225,7 @@ class Utility(subclasses.Cog):
         )
 
         if not ctx.interaction:
-            if response["run"]["code"] != 0:
+            if run["code"] != 0:
                 await ctx.message.add_reaction(misc.no)
             else:
                 await ctx.message.add_reaction(misc.yes)
@@ -225,7 +235,7 @@ class Utility(subclasses.Cog):
         # Avoid repetition
         names = set(
             r["language"]
-            for r in misc.runtimes
+            for r in self.bot.executor.backend.languages()
             if current.casefold() in r["language"] or len(current) == 0
         )
         return sorted(
@@ -6,7 +6,7 @@ import discord
 import psutil
 from discord.ext import commands
 
-from utils import misc, subclasses, errors
+from utils import errors, misc, statistics, subclasses
 
 if TYPE_CHECKING:
     from main import AceBot
@@ -44,85 +44,68 @@ class Info:
         self._total_lines()
 
     async def stats(self, embed: discord.Embed, guild: Optional[discord.Guild] = None):
+        # Write buffered counters first so the numbers are up to date
+        await self.bot.stats.flush()
+        local = guild.id if guild else 0
         async with self.bot.pool.acquire() as conn:
-            self.commands_ran = (
-                await conn.fetchone(
-                    "SELECT total(value) FROM statistics WHERE key LIKE 'CMD_RAN:%';"
+            totals = {
+                (row[0], row[1]): row[2]
+                for row in await conn.fetchall(
+                    "SELECT id, key, value FROM statistics_rollup WHERE id IN (?, ?);",
+                    (statistics.GLOBAL, local),
                 )
-            )[0]
-            self.songs_played = (
-                await conn.fetchone(
-                    "SELECT total(value) FROM statistics WHERE key = 'SONG_PLAYED';"
-                )
-            )[0]
-            self.playtime = (
-                await conn.fetchone(
-                    "SELECT total(value) FROM statistics WHERE key = 'SONG_PLAYTIME';"
-                )
-            )[0]
+            }
 
-            # TOP COMMANDS
+            # TOP COMMANDS, a primary key range scan bounded by the number of commands
             self.top_commands = await conn.fetchall(
-                "SELECT key, value FROM statistics WHERE key LIKE 'CMD_RAN:%' AND id = ? ORDER BY value DESC LIMIT 5;",
-                (guild.id or 0),
+                "SELECT key, value FROM statistics WHERE id = ? AND key >= 'CMD_RAN:' AND key < 'CMD_RAN;' ORDER BY value DESC LIMIT 5;",
+                (local,),
             )
 
-            local_commands_ran = (
-                await conn.fetchone(
-                    "SELECT total(value) FROM statistics WHERE key LIKE 'CMD_RAN:%' AND id = ?;",
-                    (guild.id if guild else 0),
-                )
-            )[0]
-            medals = [
-                "\N{FIRST PLACE MEDAL}",
-                "\N{SECOND PLACE MEDAL}",
-                "\N{THIRD PLACE MEDAL}",
-                "\N{SPORTS MEDAL}",
-                "\N{SPORTS MEDAL}",
+        self.commands_ran = totals.get((statistics.GLOBAL, "CMD_RAN"), 0)
+        self.songs_played = totals.get((statistics.GLOBAL, "SONG_PLAYED"), 0)
+        self.playtime = totals.get((statistics.GLOBAL, "SONG_PLAYTIME"), 0)
+        local_commands_ran = totals.get((local, "CMD_RAN"), 0)
+
+        medals = [
+            "\N{FIRST PLACE MEDAL}",
+            "\N{SECOND PLACE MEDAL}",
+            "\N{THIRD PLACE MEDAL}",
+            "\N{SPORTS MEDAL}",
+            "\N{SPORTS MEDAL}",
+        ]
+        top_commands = f"\n{misc.space}".join(
+            [
+                f"{medals[i]} {cmd[0].split(':')[1]}: `{cmd[1]}`"
+                for i, cmd in enumerate(self.top_commands)
             ]
-            top_commands = f"\n{misc.space}".join(
-                [
-                    f"{medals[i]} {cmd[0].split(':')[1]}: `{cmd[1]}`"
-                    for i, cmd in enumerate(self.top_commands)
-                ]
-            )
+        )
+
+        embed.add_field(
+            name="Top commands",
+            value=(
+                f"{misc.space}{top_commands}\n\n"
+                f"{misc.space}Total ran: `{self.commands_ran:.0f}`\n"
+                f"{misc.space}{misc.curve} from {'guild' if guild else 'DMs'}: `{local_commands_ran:.0f}`"
+            ),
+        )
+
+        # Guild only
+        if guild:
+            guild_songs_played = totals.get((local, "SONG_PLAYED"), 0)
+            guild_playtime = totals.get((local, "SONG_PLAYTIME"), 0)
 
             embed.add_field(
-                name="Top commands",
+                name="Music statistics",
                 value=(
-                    f"{misc.space}{top_commands}\n\n"
-                    f"{misc.space}Total ran: `{self.commands_ran:.0f}`\n"
-                    f"{misc.space}{misc.curve} from {'guild' if guild else 'DMs'}: `{local_commands_ran:.0f}`"
+                    f"{misc.space}Total songs played: `{self.songs_played:.0f}`\n"
+                    f"{misc.space}{misc.curve} from guild: `{guild_songs_played:.0f}`\n\n"
+                    f"{misc.space}Total playtime: `{misc.time_format(self.playtime)}`\n"
+                    f"{misc.space}{misc.curve} from guild: `{misc.time_format(guild_playtime)}`"
                 ),
             )
 
-            # Guild only
-            if guild:
-                guild_songs_played = (
-                    await conn.fetchone(
-                        "SELECT total(value) FROM statistics WHERE key = 'SONG_PLAYED' AND id = ?;",
-                        (guild.id),
-                    )
-                )[0]
-                guild_playtime = (
-                    await conn.fetchone(
-                        "SELECT total(value) FROM statistics WHERE key = 'SONG_PLAYTIME' AND id = ?;",
-                        (guild.id),
-                    )
-                )[0]
-
-                embed.add_field(
-                    name="Music statistics",
-                    value=(
-                        f"{misc.space}Total songs played: `{self.songs_played:.0f}`\n"
-                        f"{misc.space}{misc.curve} from guild: `{guild_songs_played:.0f}`\n\n"
-                        f"{misc.space}Total playtime: `{misc.time_format(self.playtime)}`\n"
-                        f"{misc.space}{misc.curve} from guild: `{misc.time_format(guild_playtime)}`"
-                    ),
-                )
-
-            await conn.close()
-            return embed
+        return embed
 
     def _total_lines(self):
         root = pathlib.Path(__file__).parent.parent
@@ -151,6 +134,7 @@ class InfoView(subclasses.View):
 
     async def embed(self, ctx: commands.Context):
         info: Info = self.bot.info
+        monitor = self.bot.loop_monitor
         assert self.bot.user is not None
         # METHOD CHAINING!!!
         embed = (
@@ -196,6 +180,14 @@ class InfoView(subclasses.View):
                     f"{misc.space}mem: `{info.memory:,.1f}MB` (`{info.memory100:.1f}%`)"
                 ),
             )
+            .add_field(
+                name="Event loop",
+                value=(
+                    f"{misc.space}lag p50: `{monitor.percentile(50):.1f}ms`\n"
+                    f"{misc.space}lag p99: `{monitor.percentile(99):.1f}ms`\n"
+                    f"{misc.space}blocked: `{monitor.blocked}` times"
+                ),
+            )
         )
         return await self.bot.info.stats(embed, ctx.guild)
 
@@ -0,0 +1,165 @@
+import math
+import textwrap
+from typing import Iterable, List
+
+import discord
+import wavelink
+from discord.ext import commands
+
+from utils import misc, paginator
+
+
+def _length(track: wavelink.Playable) -> int:
+    # Streams have no meaningful length
+    return 0 if track.is_stream else track.length
+
+
+class TrackList(List[wavelink.Playable]):
+    """A list of tracks that keeps their total length (in ms) up to date
+
+    wavelink's Queue only ever touches its tracks through list methods,
+    so this stands in for its `_items` without it knowing."""
+
+    def __init__(self, tracks: Iterable[wavelink.Playable] = ()) -> None:
+        super().__init__(tracks)
+        self.duration = sum(map(_length, self))
+
+    def append(self, track: wavelink.Playable) -> None:
+        super().append(track)
+        self.duration += _length(track)
+
+    def extend(self, tracks: Iterable[wavelink.Playable]) -> None:
+        tracks = list(tracks)
+        super().extend(tracks)
+        self.duration += sum(map(_length, tracks))
+
+    def __iadd__(self, tracks: Iterable[wavelink.Playable]) -> "TrackList":
+        self.extend(tracks)
+        return self
+
+    def insert(self, index: int, track: wavelink.Playable) -> None:
+        super().insert(index, track)
+        self.duration += _length(track)
+
+    def pop(self, index: int = -1) -> wavelink.Playable:
+        track = super().pop(index)
+        self.duration -= _length(track)
+        return track
+
+    def remove(self, track: wavelink.Playable) -> None:
+        super().remove(track)
+        self.duration -= _length(track)
+
+    def clear(self) -> None:
+        super().clear()
+        self.duration = 0
+
+    def copy(self) -> "TrackList":
+        return TrackList(self)
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            super().__setitem__(index, value)
+            self.duration = sum(map(_length, self))
+        else:
+            # Shuffling goes through here, two swaps per track
+            old = self[index]
+            super().__setitem__(index, value)
+            self.duration += _length(value) - _length(old)
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            super().__delitem__(index)
+            self.duration = sum(map(_length, self))
+        else:
+            self.duration -= _length(self[index])
+            super().__delitem__(index)
+
+
+class TrackedQueue(wavelink.Queue):
+    """wavelink Queue that knows how long it is without counting"""
+
+    def __init__(self, *, history: bool = True) -> None:
+        super().__init__(history=history)
+        self._items = TrackList()
+
+    @property
+    def duration(self) -> int:
+        return self._items.duration
+
+
+class Player(wavelink.Player):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.queue = TrackedQueue()
+        self.auto_queue = TrackedQueue()
+
+
+def duration(queue: wavelink.Queue) -> int:
+    """Total length of the queue in ms"""
+    # Players connected before a reload may still have plain queues
+    items = queue._items
+    if isinstance(items, TrackList):
+        return items.duration
+    return sum(map(_length, items))
+
+
+class QueueView(paginator.Paginator):
+    """The queue then the autoplay queue, one page at a time
+
+    Pages are rendered from the live queues when shown, so opening it
+    does not depend on the size of the queue and every page is up to date.
+    Each line gets an even share of the embed, the link goes if it is too long."""
+
+    def __init__(
+        self, ctx: commands.Context, player: wavelink.Player, per_page: int = 20
+    ) -> None:
+        super().__init__(
+            ctx=ctx,
+            embed=discord.Embed(color=discord.Color.blurple()),
+        )
+        self.player = player
+        self.per_page = per_page
+        # Newlines between the lines included
+        self.line_length = (self.max_chars - per_page + 1) // per_page
+
+    @property
+    def tracks(self) -> int:
+        return len(self.player.queue) + len(self.player.auto_queue)
+
+    @property
+    def page_count(self) -> int:
+        return max(1, math.ceil(self.tracks / self.per_page))
+
+    async def count_pages(self) -> int:
+        return self.page_count
+
+    async def get_page(self, index: int) -> str:
+        queue, auto_queue = self.player.queue, self.player.auto_queue
+        start = index * self.per_page
+        lines = []
+        for i in range(start, min(start + self.per_page, self.tracks)):
+            track = queue[i] if i < len(queue) else auto_queue[i - len(queue)]
+            title = textwrap.shorten(
+                track.title.replace("[", "(").replace("]", ")"),
+                45,
+                break_long_words=False,
+                placeholder="...",
+            )
+            line = f"`{i + 1:02d}` | [`{title}`]({track.uri})"
+            if not track.uri or len(line) > self.line_length:
+                line = f"`{i + 1:02d}` | `{title}`"
+            lines.append(line)
+        return "\n".join(lines) or "Queue empty !"
+
+    def _update_embed(self, embed: discord.Embed, page: str) -> discord.Embed:
+        tracks = self.tracks
+        total = duration(self.player.queue) + duration(self.player.auto_queue)
+        embed.title = f"Queue ({tracks} {'songs' if tracks > 1 else 'song'})"
+        embed = super()._update_embed(embed, page)
+        # On this page only, the template is shared by every page
+        label = self._page_label().replace("/", " of ")
+        embed.set_footer(
+            text=f"Total length: {misc.time_format(total // 1000)} • Page {label}"
+        )
+        return embed
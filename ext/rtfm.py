@@ -1,17 +1,24 @@
-import difflib
+import asyncio
 import io
+import json
+import logging
+import pathlib
 import re
 import time
 import zlib
-from typing import Dict, Generator, List, Tuple
+from typing import Generator, Optional
 
+import aiohttp
 import discord
-import requests
 from discord.ext import commands
 
-from utils.misc import avg
+from utils.search import NgramIndex
 
-rtfm_cache: dict = None
+LOGGER = logging.getLogger("discord")
+
+directory = pathlib.Path(__file__).parent.parent / "cache" / "rtfm"
+
+rtfm_cache: dict[str | tuple, NgramIndex[dict[str, str]]] = {}
 
 RTFM_PAGES = {
     ("stable"): "https://discordpy.readthedocs.io/en/stable",
@@ -27,6 +34,12 @@ for src in RTFM_PAGES.keys():
         literal_rtfm.update(src)
 
 
+# This mostly comes from the Sphinx repository, spaces can't cross lines
+ENTRY_REGEX = re.compile(
+    r"^(.+?)[ \t]+(\S*:\S*)[ \t]+(-?\d+)[ \t]+(\S+)[ \t]+(.*?)[ \t\r]*$", re.MULTILINE
+)
+
+
 class SphinxObjectFileReader:
     BUFFER = 16 * 1024
 
@@ -48,15 +61,23 @@ class SphinxObjectFileReader:
             yield decompressor.decompress(chunk)
         yield decompressor.flush()
 
-    def read_compressed_lines(self) -> Generator[str, None, None]:
-        buffer = b""
+    def read_compressed_blocks(self) -> Generator[str, None, None]:
+        """Decompressed text cut at the last newline of each chunk, lines stay whole"""
+        buffer = bytearray()
         for chunk in self.read_compressed_chunks():
             buffer += chunk
-            position = buffer.find(b"\n")
-            while position != -1:
-                yield buffer[:position].decode()
-                buffer = buffer[position + 1 :]
-                position = buffer.find(b"\n")
+            end = buffer.rfind(b"\n")
+            if end != -1:
+                yield buffer[: end + 1].decode()
+                # Only the trailing partial line is left to move
+                del buffer[: end + 1]
+
+        if buffer:
+            yield buffer.decode()
+
+    def read_compressed_lines(self) -> Generator[str, None, None]:
+        for block in self.read_compressed_blocks():
+            yield from block.splitlines()
 
 
 def parse_object_inv(stream: SphinxObjectFileReader, url: str) -> dict[str, str]:
@@ -80,94 +101,160 @@ def parse_object_inv(stream: SphinxObjectFileReader, url: str) -> dict[str, str]
     if "zlib" not in line:
         raise RuntimeError("Invalid objects.inv file, not z-lib compatible.")
 
-    # This code mostly comes from the Sphinx repository.
-    entry_regex = re.compile(r"(?x)(.+?)\s+(\S*:\S*)\s+(-?\d+)\s+(\S+)\s+(.*)")
-    for line in stream.read_compressed_lines():
-        match = entry_regex.match(line.rstrip())
-        if not match:
-            continue
+    # Matched against whole blocks of lines at once instead of line by line
+    for block in stream.read_compressed_blocks():
+        for name, directive, _, location, dispname in ENTRY_REGEX.findall(block):
+            domain, _, subdirective = directive.partition(":")
+            if directive == "py:module" and name in result:
+                continue
+
+            if directive == "std:doc":
+                subdirective = "label"
 
-        name, directive, _, location, dispname = match.groups()
-        domain, _, subdirective = directive.partition(":")
-        if directive == "py:module" and name in result:
-            continue
+            if location.endswith("$"):
+                location = location[:-1] + name
 
-        if directive == "std:doc":
-            subdirective = "label"
+            key = name if dispname == "-" else dispname
+            prefix = f"{subdirective}:" if domain == "std" else ""
 
-        if location.endswith("$"):
-            location = location[:-1] + name
+            if projname == "discord.py":
+                key = key.replace("discord.ext.commands.", "").replace("discord.", "")
 
-        key = name if dispname == "-" else dispname
-        prefix = f"{subdirective}:" if domain == "std" else ""
+            result[f"{prefix}{key}"] = {
+                "url": "/".join((url, location)),
+                "type": directive.split(":")[1],
+            }
+
+    return result
 
-        if projname == "discord.py":
-            key = key.replace("discord.ext.commands.", "").replace("discord.", "")
 
-        result[f"{prefix}{key}"] = {
-            "url": "/".join((url, location)),
-            "type": directive.split(":")[1],
+def _slug(key: str | tuple) -> str:
+    return key if isinstance(key, str) else key[0]
+
+
+def _index(data: bytes, page: str) -> NgramIndex[dict[str, str]]:
+    return NgramIndex(parse_object_inv(SphinxObjectFileReader(data), page).items())
+
+
+def _read_inventory(key: str | tuple, page: str) -> Optional[NgramIndex]:
+    path = directory / f"{_slug(key)}.inv"
+    try:
+        with open(path, "rb") as file:
+            return _index(file.read(), page)
+    except FileNotFoundError:
+        return None
+    except (OSError, RuntimeError, ValueError, zlib.error):
+        # Truncated or corrupt, drop it along with its validators so it is fetched anew
+        LOGGER.warning("Discarding corrupt rtfm inventory %s", path, exc_info=1)
+        path.unlink(missing_ok=True)
+        (directory / f"{_slug(key)}.json").unlink(missing_ok=True)
+        return None
+
+
+def _write_inventory(key: str | tuple, data: bytes, meta: dict[str, str]) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for suffix, content in ((".inv", data), (".json", json.dumps(meta).encode())):
+        tmp = directory / f"{_slug(key)}{suffix}.tmp"
+        tmp.write_bytes(content)
+        tmp.replace(directory / f"{_slug(key)}{suffix}")
+
+
+def _read_meta(key: str | tuple) -> dict[str, str]:
+    try:
+        with open(directory / f"{_slug(key)}.json", "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+async def fetch_inventory(session: aiohttp.ClientSession, key: str | tuple, page: str):
+    """Revalidates an objects.inv against the copy on disk, parses it only if changed"""
+    meta = await asyncio.to_thread(_read_meta, key)
+    headers = {}
+    if key in rtfm_cache or (directory / f"{_slug(key)}.inv").exists():
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    async with session.get(
+        page + "/objects.inv", headers=headers, timeout=aiohttp.ClientTimeout(total=30)
+    ) as resp:
+        if resp.status == 304:
+            if key not in rtfm_cache:
+                inventory = await asyncio.to_thread(_read_inventory, key, page)
+                if inventory is None:
+                    # The copy on disk was unusable and is gone, ask for the full file
+                    return await fetch_inventory(session, key, page)
+                rtfm_cache[key] = inventory
+            return
+
+        if resp.status != 200:
+            raise RuntimeError(f"Failed to fetch {page}/objects.inv ({resp.status})")
+
+        data = await resp.read()
+        meta = {
+            "etag": resp.headers.get("ETag", ""),
+            "last_modified": resp.headers.get("Last-Modified", ""),
         }
 
-    return result
+    await asyncio.to_thread(_write_inventory, key, data, meta)
+    # Parsing and indexing are pure CPU, keep them off the event loop
+    rtfm_cache[key] = await asyncio.to_thread(_index, data, page)
 
 
-async def build_rtfm_table():
-    # Build cache
-    cache: dict[str, dict[str, dict[str, str]]] = {}
-    for key, page in RTFM_PAGES.items():
-        cache[key] = {}
-        # Get objects.inv from docs
-        with requests.get(page + "/objects.inv") as resp:
-            if resp.status_code != 200:
-                raise RuntimeError("Failed")
+async def build_rtfm_table(session: aiohttp.ClientSession):
+    """Revalidates every inventory concurrently"""
+    results = await asyncio.gather(
+        *(fetch_inventory(session, key, page) for key, page in RTFM_PAGES.items()),
+        return_exceptions=True,
+    )
+    for key, result in zip(RTFM_PAGES.keys(), results):
+        if isinstance(result, BaseException):
+            LOGGER.warning(
+                "Failed to refresh rtfm inventory for %s", key, exc_info=result
+            )
 
-            stream = SphinxObjectFileReader(resp.content)
-            cache[key] = parse_object_inv(stream, page)
 
-    global rtfm_cache
-    rtfm_cache = cache
+async def load_rtfm_table():
+    """Loads the inventories saved on disk, no network involved"""
+    for key, page in RTFM_PAGES.items():
+        inventory = await asyncio.to_thread(_read_inventory, key, page)
+        if inventory is not None:
+            rtfm_cache[key] = inventory
 
 
 async def do_rtfm(ctx: commands.Context, key: tuple, obj: str = None):
     if obj is None:
         return await ctx.reply(RTFM_PAGES[key], mention_author=False)
 
-    # If no cache
-    if not rtfm_cache:
+    # Nothing on disk yet, only happens on a fresh install
+    if key not in rtfm_cache:
         await ctx.typing()
-        await build_rtfm_table()
+        await fetch_inventory(ctx.bot.session, key, RTFM_PAGES[key])
 
     # Discard any discord.ext.commands
     obj = re.sub(r"^(?:discord\.(?:ext\.)?)?(?:commands\.)?(.+)", r"\1", obj)
 
-    cache: List[Tuple[str, Dict[str, str]]] = list(rtfm_cache[key].items())
-
-    # Sort and get the top 8 items
-    t = time.time()
+    t = time.perf_counter()
     _type = None
     if ":" in obj:
         _type, obj = obj.split(":", maxsplit=1)
+        _type = _type.casefold()
 
-    matches = sorted(
-        cache,
-        key=lambda c: avg(
-            [
-                difflib.SequenceMatcher(None, m[0].casefold(), m[1].casefold()).ratio()
-                for m in zip(reversed(obj.split(".")), c[0].split())
-            ]
-        )
-        + (5 * c[1]["type"].startswith(_type.casefold()) if _type else 0),
-        reverse=True,
-    )[:8]
-    t = time.time() - t
+    matches = rtfm_cache[key].search(
+        obj,
+        k=8,
+        predicate=(lambda data: data["type"].startswith(_type)) if _type else None,
+    )
+    t = time.perf_counter() - t
 
     embed = discord.Embed(
         title=f"RTFM - {'Discord.py' if key == ('stable') else key[0].capitalize()}",
         colour=discord.Colour.blurple(),
     )
     embed.set_footer(
-        text=f"Query time : {t:,.2f}s",
+        text=f"Query time : {t * 1000:,.2f}ms",
         icon_url=ctx.author.avatar.url,
     )
     if len(matches) == 0:
@@ -177,7 +264,7 @@ async def do_rtfm(ctx: commands.Context, key: tuple, obj: str = None):
 
     # Format results
     results = []
-    for key, data in matches:
+    for _, key, data in matches:
         results.append(f"[`{data['type'][:4]}`] [`{key}`]({data['url']})")
 
     embed.description = "\n".join(results)
@@ -0,0 +1,166 @@
+import difflib
+import json
+import pathlib
+import random
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from utils import misc
+
+directory = pathlib.Path(__file__).parent
+
+
+class Country:
+    """The parts of a countries.json entry the bot uses"""
+
+    __slots__ = (
+        "cca2",
+        "cca3",
+        "names",
+        "native_names",
+        "languages",
+        "capital",
+        "region",
+        "subregion",
+        "timezones",
+        "area",
+        "gini",
+        "currency",
+        "people",
+        "population",
+        "flag",
+        "maps",
+        "answers",
+    )
+
+    def __init__(self, data: dict) -> None:
+        self.cca2: str = data["cca2"]
+        self.cca3: str = data["cca3"]
+        # common, official
+        self.names: Tuple[str, str] = (data["name"]["common"], data["name"]["official"])
+        self.native_names: Tuple[str, ...] = tuple(
+            {n["official"] for n in (data["name"].get("nativeName") or {}).values()}
+        )
+        self.languages: Tuple[str, ...] = tuple(
+            set((data.get("languages") or {}).values())
+        )
+
+        capital = data.get("capital", None)
+        self.capital: str = capital[0] if capital else "Unknown"
+
+        self.region: str = data["region"]
+        self.subregion: Optional[str] = data.get("subregion", None)
+        self.timezones: Tuple[str, ...] = tuple(data["timezones"])
+        self.area: float = data["area"]
+
+        # (year, index)
+        self.gini: Optional[Tuple[str, float]] = next(
+            iter((data.get("gini") or {}).items()), None
+        )
+        # (name, symbol)
+        self.currency: Optional[Tuple[str, str]] = next(
+            (
+                (c["name"], c.get("symbol", ""))
+                for c in (data.get("currencies") or {}).values()
+            ),
+            None,
+        )
+
+        self.people: dict = data.get("demonyms", None)
+        self.population: int = data.get("population", None)
+
+        self.flag: str = data["flags"]["png"]
+        # google maps, openstreetmap
+        self.maps: Tuple[str, str] = (
+            data["maps"]["googleMaps"],
+            data["maps"]["openStreetMaps"],
+        )
+
+        # Every accepted guess, cleaned the same way guesses are
+        answers = [*self.names, *data.get("altSpellings", [])]
+        for translation in (data.get("translations") or {}).values():
+            answers.extend((translation["common"], translation["official"]))
+        self.answers: FrozenSet[bytes] = frozenset(
+            cleaned
+            for cleaned in (misc.clean_string(answer).strip() for answer in answers)
+            # Non latin scripts clean down to punctuation, 2 letter codes are too easy
+            if sum(97 <= c <= 122 for c in cleaned) > 2
+        )
+
+    def accuracy(self, guess: bytes, threshold: float) -> float:
+        """Best ratio of a cleaned guess to the answers, 0 if all are under `threshold`"""
+        if guess in self.answers:
+            return 1.0
+
+        best = 0.0
+        # difflib caches details about the second sequence, so it holds the guess
+        matcher = difflib.SequenceMatcher(None, b=guess)
+        for answer in self.answers:
+            floor = max(best, threshold)
+            # The ratio can't go over 2 * shortest / total length
+            if 2 * min(len(answer), len(guess)) / (len(answer) + len(guess)) < floor:
+                continue
+
+            matcher.set_seq1(answer)
+            if matcher.quick_ratio() < floor:
+                continue
+            best = max(best, matcher.ratio())
+        return best
+
+    def __repr__(self) -> str:
+        return f"<Country {self.cca3} {self.names[0]!r}>"
+
+
+class Countries:
+    """countries.json parsed once, with lookups by code, name and region"""
+
+    def __init__(self, path: pathlib.Path = directory / "countries.json") -> None:
+        with open(path, "r", encoding="utf-8") as file:
+            self.all: Tuple[Country, ...] = tuple(Country(c) for c in json.load(file))
+
+        self.by_cca2: Dict[str, Country] = {c.cca2.casefold(): c for c in self.all}
+        self.by_cca3: Dict[str, Country] = {c.cca3.casefold(): c for c in self.all}
+
+        self.by_name: Dict[str, Country] = {}
+        for country in self.all:
+            for name in country.names:
+                self.by_name.setdefault(name.casefold(), country)
+
+        by_region: Dict[str, List[Country]] = {}
+        for country in self.all:
+            by_region.setdefault(country.region.casefold(), []).append(country)
+        self.by_region: Dict[str, Tuple[Country, ...]] = {
+            region: tuple(countries) for region, countries in by_region.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.all)
+
+    def find(self, query: str) -> Optional[Country]:
+        """Looks a country up by common or official name, cca3 or cca2 (tld)"""
+        query = query.casefold()
+        return (
+            self.by_name.get(query)
+            or self.by_cca3.get(query)
+            or self.by_cca2.get(query.removeprefix("."))
+        )
+
+    def sample(self, region: str, k: int) -> List[Country]:
+        """Picks `k` countries of a region ("global" for all of them)
+
+        No country comes up twice before the whole region went by"""
+        pool = self.all if region == "global" else self.by_region[region.casefold()]
+        picked: List[Country] = []
+        while len(picked) < k:
+            picked.extend(random.sample(pool, min(k - len(picked), len(pool))))
+        return picked
+
+
+_countries: Optional[Countries] = None
+
+
+def get() -> Countries:
+    """The shared dataset, loaded on first use"""
+    global _countries
+    if _countries is None:
+        _countries = Countries()
+    return _countries
@@ -1,41 +1,18 @@
-import aiohttp
 import asyncio
-import difflib
-import json
-import pathlib
-import random
 import time
 from io import BytesIO
-from typing import List
 
 import discord
 from discord.ext.commands.context import Context
 
 from utils import misc
 
+from . import flags
+from .countries import get as get_countries
 from .game import Game
 
-directory = pathlib.Path(__file__).parent
-
-
-class Country:
-    def __init__(self, data: dict) -> None:
-        # Country info
-        self.names: List[str] = [
-            data["name"]["common"],
-            data["name"]["official"],
-        ]
-
-        self.capital: str = data.get("capital", None)
-        self.capital: str = self.capital[0] if self.capital else "Unknown"
-
-        self.region: str = data["region"]
-        self.subregion: str = data.get("subregion", None)
-
-        self.people: dict = data.get("demonyms", None)
-        self.population: int = data.get("population", None)
-
-        self.flag: str = data["flags"]["png"]
+# Minimum similarity for a guess to count
+ACCURACY = 0.65
 
 
 class CountryGuesser(Game):
@@ -80,7 +57,8 @@ class CountryGuesser(Game):
         )
 
     def text_input(self, msg: discord.Message) -> bool:
-        if not (msg.content):
+        # Only messages from the game's channel get routed here
+        if msg.author.bot or not msg.content:
             return False
 
         if msg.author == self.gamemaster:
@@ -99,15 +77,12 @@ class CountryGuesser(Game):
                 )
                 return True
 
-        self.accuracy = max(
-            [
-                difflib.SequenceMatcher(
-                    None, misc.clean_string(name), misc.clean_string(msg.content)
-                ).ratio()
-                for name in self.country.names
-            ]
-        )
-        if self.accuracy >= 0.65:
+        guess = misc.clean_string(msg.content).strip()
+        if not guess:
+            return False
+
+        self.accuracy = self.country.accuracy(guess, ACCURACY)
+        if self.accuracy >= ACCURACY:
             self.winner = msg.author
             asyncio.create_task(msg.add_reaction("\N{WHITE HEAVY CHECK MARK}"))
             return True
@@ -115,35 +90,17 @@ class CountryGuesser(Game):
 
     async def start(self, interaction: discord.Interaction):
         ## Get country data
-        with open(directory / "countries.json", "r") as file:
-            data = json.load(file)
-            match self.region:
-                case "global":
-                    countries = [
-                        Country(data) for data in random.choices(data, k=self.rounds)
-                    ]
-                case spec:
-                    countries = [
-                        Country(data)
-                        for data in random.choices(
-                            [
-                                country
-                                for country in data
-                                if country["region"].casefold() == spec
-                            ],
-                            k=self.rounds,
-                        )
-                    ]
+        countries = get_countries().sample(self.region, self.rounds)
 
         ## Game loop
         while self.playing:
             self.country = countries[self.round]
             self.round += 1
 
-            # Getting the flag image from the url to send it as a file
-            async with aiohttp.ClientSession() as cs:
-                async with cs.get(self.country.flag) as res:
-                    _bytes = await res.read()
+            # Usually prefetched during the previous round
+            _bytes = await flags.cache.get(self.ctx.bot.session, self.country.flag)
+            if self.round < self.rounds:
+                flags.cache.prefetch(self.ctx.bot.session, countries[self.round].flag)
 
             buff = BytesIO(_bytes)
             file = discord.File(buff, filename="flag.png")
@@ -171,9 +128,7 @@ class CountryGuesser(Game):
             self.response_time = time.time()
 
             try:
-                msg: discord.Message = await self.ctx.bot.wait_for(
-                    "message", check=self.text_input, timeout=self.timeout
-                )
+                msg = await self.wait_for_input(timeout=self.timeout)
 
             ## Game timeout
             except asyncio.TimeoutError:
@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import logging
+import pathlib
+from collections import OrderedDict
+from typing import Dict
+
+import aiohttp
+
+LOGGER = logging.getLogger("discord")
+
+directory = pathlib.Path(__file__).parent.parent / "cache" / "flags"
+
+
+def _write(file: pathlib.Path, data: bytes) -> None:
+    file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = file.with_suffix(".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(file)
+
+
+class FlagCache:
+    """Flag images kept in an LRU of `size` entries, backed by files on disk
+
+    Concurrent requests for the same url share a single download."""
+
+    def __init__(self, size: int = 64, path: pathlib.Path = directory) -> None:
+        self.size = size
+        self.path = path
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    def _file(self, url: str) -> pathlib.Path:
+        suffix = pathlib.PurePosixPath(url).suffix or ".png"
+        return self.path / (hashlib.sha1(url.encode()).hexdigest() + suffix)
+
+    def _remember(self, url: str, data: bytes) -> None:
+        self._memory[url] = data
+        self._memory.move_to_end(url)
+        while len(self._memory) > self.size:
+            self._memory.popitem(last=False)
+
+    async def _load(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        file = self._file(url)
+        try:
+            data = await asyncio.to_thread(file.read_bytes)
+        except FileNotFoundError:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as res:
+                res.raise_for_status()
+                data = await res.read()
+            await asyncio.to_thread(_write, file, data)
+
+        self._remember(url, data)
+        return data
+
+    def _schedule(self, session: aiohttp.ClientSession, url: str) -> asyncio.Task:
+        task = self._pending.get(url)
+        if task is None:
+            task = self._pending[url] = asyncio.create_task(self._load(session, url))
+            task.add_done_callback(lambda _: self._pending.pop(url, None))
+        return task
+
+    async def get(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        data = self._memory.get(url)
+        if data is not None:
+            self._memory.move_to_end(url)
+            return data
+
+        # Shielded so a cancelled game doesn't cancel a download others wait on
+        return await asyncio.shield(self._schedule(session, url))
+
+    def prefetch(self, session: aiohttp.ClientSession, url: str) -> None:
+        """Starts loading a flag in the background, errors only show up in the logs"""
+        if url in self._memory or url in self._pending:
+            return
+
+        def done(task: asyncio.Task) -> None:
+            if not task.cancelled() and task.exception():
+                LOGGER.warning(
+                    "Failed to prefetch flag %s", url, exc_info=task.exception()
+                )
+
+        self._schedule(session, url).add_done_callback(done)
+
+
+cache = FlagCache()
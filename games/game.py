@@ -1,3 +1,4 @@
+import asyncio
 import random
 import string
 import time
@@ -9,6 +10,8 @@ from tabulate import tabulate
 
 from utils import misc, subclasses
 
+from . import leaderboard
+
 if TYPE_CHECKING:
     from main import AceBot
 
@@ -108,9 +111,20 @@ class ConfigView(subclasses.View):
                     ephemeral=True,
                 )
 
+        if not self.bot.game_router.register(self.game):
+            return await interaction.response.send_message(
+                "A game is already running in this channel !", ephemeral=True
+            )
+
         self.bot.games[self.game.id] = self.game
         self.stop()
-        await self.game.start(interaction)
+        try:
+            await self.game.start(interaction)
+        except BaseException:
+            # Never reached end_game, the channel would stay taken until a restart
+            self.bot.game_router.unregister(self.game)
+            self.bot.games.pop(self.game.id, None)
+            raise
 
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.red, row=2)
     async def cancel(self, interaction: discord.Interaction, button: discord.Button):
@@ -124,21 +138,17 @@ class ConfigView(subclasses.View):
 
     @discord.ui.button(label="Profile", row=2)
     async def profile(self, interaction: discord.Interaction, button: discord.Button):
-        async with self.bot.pool.acquire() as conn:
-            scores = await conn.fetchall(
-                "WITH Leaderboard AS (SELECT id, value, ROW_NUMBER() OVER (ORDER BY value DESC) as row_num FROM statistics WHERE key = :key) SELECT id, value, row_num FROM Leaderboard WHERE id = :id UNION SELECT id, value, row_num FROM Leaderboard WHERE row_num <= 3 ORDER BY value DESC;",
-                {
-                    "key": f"game.{self.game.__class__.__qualname__}:score",
-                    "id": interaction.user.id,
-                },
-            )
-            games = await conn.fetchall(
-                "WITH Leaderboard AS (SELECT id, value, ROW_NUMBER() OVER (ORDER BY value DESC) as row_num FROM statistics WHERE key = :key) SELECT id, value, row_num FROM Leaderboard WHERE id = :id UNION SELECT id, value, row_num FROM Leaderboard WHERE row_num <= 3 ORDER BY value DESC;",
-                {
-                    "key": f"game.{self.game.__class__.__qualname__}:games",
-                    "id": interaction.user.id,
-                },
+        name = self.game.__class__.__qualname__
+        boards = [("Highest score", leaderboard.board(name, "score"), "Score")]
+        if interaction.guild:
+            boards.append(
+                (
+                    "Highest score in server",
+                    leaderboard.board(name, "score", interaction.guild.id),
+                    "Score",
+                )
             )
+        boards.append(("Most games played", leaderboard.board(name, "games"), "Games"))
 
         embed = discord.Embed(color=discord.Color.blurple())
         embed.set_author(
@@ -146,50 +156,25 @@ class ConfigView(subclasses.View):
             icon_url=interaction.user.display_avatar.url,
         )
 
-        ranks = [
-            "1st",
-            "2nd",
-            "3rd",
-        ]
-        if scores:
-            data = [
-                [f"{ranks[rank-1]}", user, score] for user, score, rank in scores[:3]
-            ]
-            if len(scores) == 4:  # if user is not within the top 3
-                data.extend(
-                    [
-                        [None, None, None],
-                        [f"{scores[3][2]}th", scores[3][0], scores[3][1]],
-                    ]
-                )
-
-            leaderboard = tabulate(
-                data, headers=["Rank", "User", "Score"], tablefmt="outline"
-            )
-            embed.add_field(
-                name=f"Highest score", value=f"```\n{leaderboard}```", inline=False
-            )
-
-        if games:
-            data = [
-                [f"{ranks[rank-1]}", user, gamesplayed]
-                for user, gamesplayed, rank in games[:3]
-            ]
-            if len(games) == 4:  # if user is not within the top 3
-                data.extend(
-                    [
-                        [None, None, None],
-                        [f"{games[3][2]}th", games[3][0], games[3][1]],
-                    ]
-                )
-
-            leaderboard = tabulate(
-                data, headers=["Rank", "User", "Score"], tablefmt="outline"
-            )
-            embed.add_field(
-                name=f"Most games played",
-                value=f"```\n{leaderboard}```",
-            )
+        for title, key, header in boards:
+            top = await self.bot.leaderboard.top(key, 3)
+            if not top:
+                continue
+
+            data = [[leaderboard.ordinal(rank), user, value] for rank, user, value in top]
+            if interaction.user.id not in [user for _, user, _ in top]:
+                # if user is not within the top 3
+                own = await self.bot.leaderboard.rank(key, interaction.user.id)
+                if own:
+                    data.extend(
+                        [
+                            [None, None, None],
+                            [leaderboard.ordinal(own[0]), interaction.user.id, own[1]],
+                        ]
+                    )
+
+            table = tabulate(data, headers=["Rank", "User", header], tablefmt="outline")
+            embed.add_field(name=title, value=f"```\n{table}```", inline=False)
 
         return await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -213,6 +198,9 @@ class Game:
         self.timeout: int = 120
         self.config: Dict[str, Sequence[Any]] = {}
 
+        # Resolved by feed() with the next message text_input accepts
+        self._input: Optional[asyncio.Future[discord.Message]] = None
+
     def update_menu(self):
         embed = discord.Embed(title=self.title).set_author(
             name=self.gamemaster.display_name,
@@ -244,6 +232,7 @@ class Game:
         extras: Dict[str, Any] | None = None,
     ):
         self.ctx.bot.games.pop(self.id, None)
+        self.ctx.bot.game_router.unregister(self)
         self.playing = False
 
         embed = discord.Embed(
@@ -274,24 +263,32 @@ class Game:
         await origin.send(embed=embed)
 
     async def track_stats(self, user: discord.User, score: int) -> None:
-        async with self.ctx.bot.pool.acquire() as conn:
-            await conn.execute(
-                "INSERT INTO statistics (id, key, value) VALUES (?, ?, 1) ON CONFLICT(id, key) DO UPDATE SET value = value + 1;",
-                (
-                    user,
-                    f"game.{self.__class__.__qualname__}:games",
-                ),
-            )
-            await conn.execute(
-                "INSERT INTO statistics (id, key, value) VALUES (:id, :key, :value) ON CONFLICT(id, key) DO UPDATE SET value = value + :value;",
-                {
-                    "id": user,
-                    "key": f"game.{self.__class__.__qualname__}:score",
-                    "value": score,
-                },
-            )
+        name = self.__class__.__qualname__
+        guild = self.ctx.guild.id if self.ctx.guild else None
+        for scope in {None, guild}:
+            for stat, value in (("games", 1), ("score", score)):
+                key = leaderboard.board(name, stat, scope)
+                self.ctx.bot.stats.increment(user, key, value)
+                self.ctx.bot.leaderboard.invalidate(key)
+
+    def feed(self, msg: discord.Message) -> None:
+        """Called by the GameRouter for messages sent in the game's channel"""
+        if self._input is None or self._input.done():
+            return
 
-            await conn.commit()
+        try:
+            if self.text_input(msg):
+                self._input.set_result(msg)
+        except Exception as e:
+            self._input.set_exception(e)
+
+    async def wait_for_input(self, timeout: Optional[float] = None) -> discord.Message:
+        """Next message text_input accepts, raises asyncio.TimeoutError like wait_for"""
+        self._input = asyncio.get_running_loop().create_future()
+        try:
+            return await asyncio.wait_for(self._input, timeout=timeout)
+        finally:
+            self._input = None
 
     def text_input(self, msg: discord.Message):
         pass
@@ -0,0 +1,120 @@
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from main import AceBot
+
+
+def board(game: str, stat: str, guild: Optional[int] = None) -> str:
+    """Statistics key of a board, global unless a guild is given"""
+    key = f"game.{game}:{stat}"
+    return f"{key}@{guild}" if guild else key
+
+
+def ordinal(n: int) -> str:
+    if 10 <= n % 100 <= 20:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+
+class Leaderboard:
+    """Reads game boards out of the statistics table
+
+    Both queries are served by the (key, value DESC, id) index, counters
+    still pending in the statistics writer are added on top without flushing.
+    Results are cached for `ttl` seconds and dropped when the board is written to,
+    ranks are competition ranks so players with equal values share a rank."""
+
+    def __init__(self, bot: "AceBot", ttl: float = 60.0) -> None:
+        self.bot = bot
+        self.ttl = ttl
+        # (key, k) -> (expires, [(rank, user, value)])
+        self._top: Dict[Tuple[str, int], Tuple[float, List[Tuple[int, int, int]]]] = {}
+        # (key, user) -> (expires, (rank, value))
+        self._ranks: Dict[Tuple[str, int], Tuple[float, Optional[Tuple[int, int]]]] = {}
+
+    def invalidate(self, key: str) -> None:
+        for cache in (self._top, self._ranks):
+            for k in [k for k in cache if k[0] == key]:
+                del cache[k]
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for cache in (self._top, self._ranks):
+            if len(cache) > 1024:
+                for k in [k for k, v in cache.items() if v[0] <= now]:
+                    del cache[k]
+
+    async def _pending(self, conn, key: str, deltas: Dict[int, int]) -> Dict[int, int]:
+        """Values of the users with pending deltas, as they will be once written"""
+        if not deltas:
+            return {}
+        marks = ", ".join("?" * len(deltas))
+        rows = await conn.fetchall(
+            f"SELECT id, value FROM statistics WHERE key = ? AND id IN ({marks});",
+            (key, *deltas),
+        )
+        values = dict(deltas)
+        for user, value in rows:
+            values[user] += value
+        return values
+
+    async def top(self, key: str, k: int = 3) -> List[Tuple[int, int, int]]:
+        """Returns the best `k` entries as (rank, user, value)"""
+        cached = self._top.get((key, k))
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        async with self.bot.stats.paused(), self.bot.pool.acquire() as conn:
+            deltas = self.bot.stats.deltas(key)
+            # Users with pending deltas are ranked on their upcoming value
+            marks = ", ".join("?" * len(deltas))
+            rows = await conn.fetchall(
+                f"SELECT id, value FROM statistics WHERE key = ? AND id NOT IN ({marks}) ORDER BY value DESC, id LIMIT ?;",
+                (key, *deltas, k),
+            )
+            rows += (await self._pending(conn, key, deltas)).items()
+
+        rows = sorted(rows, key=lambda row: (-row[1], row[0]))[:k]
+        entries = []
+        for i, (user, value) in enumerate(rows):
+            rank = entries[-1][0] if entries and entries[-1][2] == value else i + 1
+            entries.append((rank, user, value))
+
+        self._prune()
+        self._top[(key, k)] = (time.monotonic() + self.ttl, entries)
+        return entries
+
+    async def rank(self, key: str, user: int) -> Optional[Tuple[int, int]]:
+        """Returns (rank, value) of a user, `None` if they are not on the board"""
+        cached = self._ranks.get((key, user))
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        async with self.bot.stats.paused(), self.bot.pool.acquire() as conn:
+            deltas = self.bot.stats.deltas(key)
+            pending = await self._pending(conn, key, deltas)
+            value = pending.get(user)
+            if value is None:
+                row = await conn.fetchone(
+                    "SELECT value FROM statistics WHERE key = ? AND id = ?;",
+                    (key, user),
+                )
+                value = row[0] if row else None
+
+            if value is None:
+                result = None
+            else:
+                marks = ", ".join("?" * len(deltas))
+                above = await conn.fetchone(
+                    f"SELECT count(*) FROM statistics WHERE key = ? AND value > ? AND id NOT IN ({marks});",
+                    (key, value, *deltas),
+                )
+                ahead = sum(1 for v in pending.values() if v > value)
+                result = (above[0] + ahead + 1, value)
+
+        self._prune()
+        self._ranks[(key, user)] = (time.monotonic() + self.ttl, result)
+        return result
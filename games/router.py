@@ -0,0 +1,34 @@
+from typing import TYPE_CHECKING, Dict, Optional
+
+import discord
+
+if TYPE_CHECKING:
+    from .game import Game
+
+
+class GameRouter:
+    """Hands each message to the game running in its channel, if any
+
+    A single dict lookup per message, instead of every running game
+    checking every message through its own `bot.wait_for`."""
+
+    def __init__(self) -> None:
+        # channel id -> game
+        self.channels: Dict[int, "Game"] = {}
+
+    def get(self, channel: int) -> Optional["Game"]:
+        return self.channels.get(channel)
+
+    def register(self, game: "Game") -> bool:
+        """Routes the game's channel to it, False if another game already has it"""
+        current = self.channels.setdefault(game.ctx.channel.id, game)
+        return current is game
+
+    def unregister(self, game: "Game") -> None:
+        if self.channels.get(game.ctx.channel.id) is game:
+            del self.channels[game.ctx.channel.id]
+
+    async def on_message(self, msg: discord.Message) -> None:
+        game = self.channels.get(msg.channel.id)
+        if game is not None:
+            game.feed(msg)
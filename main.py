@@ -1,6 +1,5 @@
 import json
 import logging
-import logging.handlers
 import time
 from typing import TYPE_CHECKING, Any, Optional
 
@@ -12,7 +11,15 @@ from discord.ext import commands
 
 from cogs import EXTENSIONS
 from ext import info
+from games.leaderboard import Leaderboard
+from games.router import GameRouter
+from utils import database, logs, metrics, migrations, piston, sandbox
+from utils.appcommands import AppCommandRegistry
 from utils.dynamic import QuitButton
+from utils.guildconfig import GuildConfig
+from utils.loopmonitor import LoopMonitor
+from utils.statistics import StatisticsWriter
+from utils.suggestions import CommandIndex
 
 if TYPE_CHECKING:
     from games import game
@@ -21,15 +28,6 @@ LOGGER = logging.getLogger("discord")
 LOGGER.setLevel(logging.INFO)
 logging.getLogger("discord.http").setLevel(logging.INFO)
 
-handler = logging.handlers.RotatingFileHandler(
-    filename="discord.log", encoding="utf-8", maxBytes=32 * 1024**2, backupCount=5
-)
-formatter = logging.Formatter(
-    "[{asctime}] [{levelname:<8}] {name}: {message}", "%Y-%m-%d %H:%M:%S", style="{"
-)
-handler.setFormatter(formatter)
-LOGGER.addHandler(handler)
-
 
 def prefix(bot: "AceBot", msg: discord.abc.Messageable):
     p = bot.config["prefix"]
@@ -43,43 +41,70 @@ class AceBot(commands.Bot):
             intents=intents,
             owner_id=owner_id,
             help_command=None,
+            # Outbound requests made by discord.py count as HTTP time
+            http_trace=metrics.trace_config(),
             **kwargs,
         )
         with open("config.json", "r") as cfg:
             self.config: dict[str, Any] = json.load(cfg)
 
-        self.pool: asqlite.Pool
+        # File logging happens on a listener thread
+        self.log_listener = logs.setup(LOGGER, self.config.get("logging"))
+
+        self.pool: metrics.TimedPool
         self.session: aiohttp.ClientSession
+        self.stats: StatisticsWriter
+        self.guild_config: GuildConfig
+        self.leaderboard = Leaderboard(self)
+        self.executor: piston.Executor
+        self.app_registry = AppCommandRegistry(self)
+        self.command_index = CommandIndex(self)
+        self.metrics = metrics.CommandMetrics()
+        self.before_invoke(self.mark_prepared)
+        self.loop_monitor = LoopMonitor(**self.config.get("loop_monitor", {}))
 
         self.boot = time.time()
         self.logger = LOGGER
         self.games: dict[str, "game.Game"] = {}
+        self.game_router = GameRouter()
 
     async def setup_hook(self):
+        # Started first so nothing blocking during startup goes unnoticed
+        self.loop_monitor.start()
+
         # Database stuff
-        self.pool = await asqlite.create_pool("database.db")
+        self.pragmas = database.pragma_profile(self.config.get("database"))
+        self.pool = metrics.TimedPool(
+            await asqlite.create_pool(
+                "database.db", init=database.initializer(self.pragmas)
+            )
+        )
         LOGGER.info("Created connection to database")
 
         async with self.pool.acquire() as conn:
-            tables = {
-                "economy": "CREATE TABLE economy ( id INTEGER NOT NULL, money INTEGER DEFAULT (0));",
-                "guildConfig": "CREATE TABLE guildConfig ( id INTEGER DEFAULT (0), key TEXT NOT NULL, value BLOB, PRIMARY KEY(id, key));",
-                "statistics": "CREATE TABLE statistics (id INTEGER DEFAULT (0), key TEXT NOT NULL, value INTEGER DEFAULT (0), PRIMARY KEY(id, key));",
-            }
-            existing_tables = [
-                name[0]
-                for name in await conn.fetchall(
-                    "SELECT name FROM sqlite_master WHERE type = 'table';"
-                )
-            ]
-            for table, schema in tables.items():
-                if table not in existing_tables:
-                    LOGGER.info(
-                        "%s table missing from database, creating one..." % table
-                    )
-                    await conn.execute(schema)
-
-            await conn.commit()
+            await migrations.migrate(conn)
+
+        # Buffered statistics
+        self.stats = StatisticsWriter(self.pool, **self.config.get("statistics", {}))
+        self.stats.start()
+
+        # Cached guild settings
+        self.guild_config = GuildConfig(self.pool)
+
+        # HTTP stuff
+        self.session = aiohttp.ClientSession(trace_configs=[metrics.trace_config()])
+
+        # Code execution for eval, on Piston or on this machine
+        eval_config = self.config.get("eval", {})
+        backend: piston.Backend
+        if eval_config.get("backend", "piston") == "local":
+            backend = sandbox.LocalBackend(**eval_config.get("local", {}))
+        else:
+            backend = piston.PistonBackend(
+                self.session, **eval_config.get("piston", {})
+            )
+        await backend.start()
+        self.executor = piston.Executor(backend, **eval_config.get("limits", {}))
 
         # Module stuff
         for extension in EXTENSIONS:
@@ -93,32 +118,76 @@ class AceBot(commands.Bot):
         # Dynamic items
         self.add_dynamic_items(QuitButton)
 
-        # HTTP stuff
-        self.session = aiohttp.ClientSession()
+        # App commands & their permissions
+        try:
+            await self.app_registry.refresh()
+        except discord.HTTPException:
+            LOGGER.error("Failed to fetch app commands", exc_info=1)
 
         # Bot info
         self.info = info.Info(self)
 
     async def close(self):
+        await self.stats.close()
+        await self.executor.backend.close()
         await self.session.close()
         await self.pool.close()
         await super().close()
+        self.loop_monitor.stop()
+        self.log_listener.stop()
+
+    # Extensions add and remove commands, anything derived from them listens to this
+    async def load_extension(self, name: str, *, package: Optional[str] = None):
+        await super().load_extension(name, package=package)
+        self.dispatch("extension_update", name)
+
+    async def unload_extension(self, name: str, *, package: Optional[str] = None):
+        await super().unload_extension(name, package=package)
+        self.dispatch("extension_update", name)
+
+    async def reload_extension(self, name: str, *, package: Optional[str] = None):
+        await super().reload_extension(name, package=package)
+        self.dispatch("extension_update", name)
+
+    async def invoke(self, ctx: commands.Context):
+        if ctx.command is None:
+            return await super().invoke(ctx)
+
+        timing = metrics.Timing()
+        token = metrics.current.set(timing)
+        try:
+            await super().invoke(ctx)
+        finally:
+            metrics.current.reset(token)
+            self.metrics.record(
+                ctx.command.qualified_name, timing, failed=ctx.command_failed
+            )
+
+    async def mark_prepared(self, ctx: commands.Context):
+        # Last before invoke hook, runs after the checks and cog_before_invoke
+        metrics.mark_prepared()
+
+    async def on_extension_update(self, name: str):
+        self.command_index.invalidate()
 
     async def on_ready(self):
         LOGGER.info("Connected as %s (ID: %d)", self.user, self.user.id)
 
+    async def on_raw_app_command_permissions_update(
+        self, payload: discord.RawAppCommandPermissionsUpdateEvent
+    ):
+        self.app_registry.on_permissions_update(payload)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.app_registry.forget(guild.id)
+        self.guild_config.invalidate(guild.id)
+
     async def log_commands_run(self, ctx: commands.Context):
         assert ctx.command is not None
-        async with self.pool.acquire() as conn:
-            # +1 command ran
-            await conn.execute(
-                "INSERT INTO statistics (id, key, value) VALUES (?, ?, 1) ON CONFLICT(id, key) DO UPDATE SET value = value + 1;",
-                (
-                    ctx.guild.id if ctx.guild else 0,
-                    "CMD_RAN:" + ctx.command.qualified_name,
-                ),
-            )
-            await conn.commit()
+        # +1 command ran
+        self.stats.increment(
+            ctx.guild.id if ctx.guild else 0, "CMD_RAN:" + ctx.command.qualified_name
+        )
 
 
 if __name__ == "__main__":
@@ -128,5 +197,6 @@ if __name__ == "__main__":
 
     bot = AceBot(intents=intents, owner_id=493107597281329185)
     bot.add_listener(bot.log_commands_run, "on_command_completion")
+    bot.add_listener(bot.game_router.on_message, "on_message")
 
     bot.run(bot.config["token"])
@@ -0,0 +1,4 @@
+-- Tables as they were created before migrations existed
+CREATE TABLE IF NOT EXISTS economy ( id INTEGER NOT NULL, money INTEGER DEFAULT (0));
+CREATE TABLE IF NOT EXISTS guildConfig ( id INTEGER DEFAULT (0), key TEXT NOT NULL, value BLOB, PRIMARY KEY(id, key));
+CREATE TABLE IF NOT EXISTS statistics (id INTEGER DEFAULT (0), key TEXT NOT NULL, value INTEGER DEFAULT (0), PRIMARY KEY(id, key));
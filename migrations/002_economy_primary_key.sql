@@ -0,0 +1,5 @@
+-- One wallet per account, duplicates created by concurrent get_wallet calls are merged
+CREATE TABLE economy_new (id INTEGER PRIMARY KEY, money INTEGER NOT NULL DEFAULT (0));
+INSERT INTO economy_new (id, money) SELECT id, max(ifnull(money, 0)) FROM economy GROUP BY id;
+DROP TABLE economy;
+ALTER TABLE economy_new RENAME TO economy;
@@ -0,0 +1,4 @@
+-- Richest accounts
+CREATE INDEX IF NOT EXISTS economy_money_idx ON economy (money DESC, id);
+-- Covers leaderboards (key, ORDER BY value) and per-key totals without touching the table
+CREATE INDEX IF NOT EXISTS statistics_key_value_idx ON statistics (key, value DESC, id);
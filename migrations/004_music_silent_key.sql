@@ -0,0 +1,2 @@
+-- shutup used to store its flag as a bare `silent` key
+UPDATE OR REPLACE guildConfig SET key = 'Music:silent' WHERE key = 'silent';
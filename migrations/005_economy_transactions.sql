@@ -0,0 +1,20 @@
+-- Append-only ledger, a NULL sender is money created and a NULL receiver is money removed
+CREATE TABLE transactions (
+    id INTEGER PRIMARY KEY,
+    sender INTEGER,
+    receiver INTEGER,
+    amount INTEGER NOT NULL CHECK (amount > 0),
+    reason TEXT,
+    created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+);
+CREATE INDEX transactions_sender_idx ON transactions (sender, created_at);
+CREATE INDEX transactions_receiver_idx ON transactions (receiver, created_at);
+
+CREATE TRIGGER transactions_no_update BEFORE UPDATE ON transactions
+BEGIN
+    SELECT RAISE(ABORT, 'transactions are append-only');
+END;
+CREATE TRIGGER transactions_no_delete BEFORE DELETE ON transactions
+BEGIN
+    SELECT RAISE(ABORT, 'transactions are append-only');
+END;
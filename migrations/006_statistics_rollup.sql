@@ -0,0 +1,16 @@
+-- Running totals kept up to date by StatisticsWriter, id -1 holds the totals across every guild
+CREATE TABLE statistics_rollup (
+    id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value INTEGER NOT NULL DEFAULT (0),
+    PRIMARY KEY(id, key)
+) WITHOUT ROWID;
+
+INSERT INTO statistics_rollup (id, key, value)
+SELECT id, CASE WHEN key LIKE 'CMD_RAN:%' THEN 'CMD_RAN' ELSE key END, sum(value)
+FROM statistics
+WHERE key LIKE 'CMD_RAN:%' OR key IN ('SONG_PLAYED', 'SONG_PLAYTIME')
+GROUP BY 1, 2;
+
+INSERT INTO statistics_rollup (id, key, value)
+SELECT -1, key, sum(value) FROM statistics_rollup GROUP BY key;
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, Optional
+
+import discord
+from discord import app_commands
+
+if TYPE_CHECKING:
+    from main import AceBot
+
+LOGGER = logging.getLogger("discord")
+
+
+class AppCommandRegistry:
+    """In-memory copy of the global app commands and their guild permission overwrites
+
+    Commands are fetched once at boot and replaced whenever the tree is synced,
+    overwrites are fetched once per guild in a single request
+    then kept up to date by APPLICATION_COMMAND_PERMISSIONS_UPDATE events.
+    A failed fetch is retried with a backoff, commands are unknown until then."""
+
+    def __init__(self, bot: "AceBot") -> None:
+        self.bot = bot
+        self.commands: Dict[str, app_commands.AppCommand] = {}
+        # guild id -> command id -> ids of the overwrite targets
+        self.permissions: Dict[int, Dict[int, FrozenSet[int]]] = {}
+        self._fetched = False
+        # Consecutive failed fetches, and when the next one may happen
+        self._failures = 0
+        self._retry_at = 0.0
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    def update(self, commands: Iterable[app_commands.AppCommand]) -> None:
+        self.commands = {cmd.name: cmd for cmd in commands}
+        self._fetched = True
+
+    async def refresh(self) -> None:
+        try:
+            commands = await self.bot.tree.fetch_commands()
+        except discord.HTTPException:
+            self._failures += 1
+            self._retry_at = time.monotonic() + min(300, 5 * 2**self._failures)
+            raise
+        self._failures = 0
+        self.update(commands)
+        LOGGER.info("Cached %d app commands", len(self.commands))
+
+    async def get(self, name: str) -> Optional[app_commands.AppCommand]:
+        """`None` for unknown commands, and for all of them until fetched"""
+        if not self._fetched and time.monotonic() >= self._retry_at:
+            try:
+                await self.refresh()
+            except discord.HTTPException:
+                LOGGER.warning("Failed to fetch app commands", exc_info=1)
+        return self.commands.get(name)
+
+    async def _load_guild(self, guild: int) -> Dict[int, FrozenSet[int]]:
+        overwrites = self.permissions.get(guild)
+        if overwrites is not None:
+            return overwrites
+
+        async with self._locks.setdefault(guild, asyncio.Lock()):
+            if guild in self.permissions:
+                return self.permissions[guild]
+
+            try:
+                data = await self.bot.http.get_guild_application_command_permissions(
+                    self.bot.application_id, guild
+                )
+            except discord.NotFound:
+                data = []
+
+            overwrites = self.permissions[guild] = {
+                int(cmd["id"]): frozenset(int(p["id"]) for p in cmd["permissions"])
+                for cmd in data
+                if cmd["permissions"]
+            }
+            return overwrites
+
+    async def targets(
+        self, guild: int, command: app_commands.AppCommand
+    ) -> Optional[FrozenSet[int]]:
+        """Ids of the users, roles and channels the command is restricted to,
+        `None` when the command has no overwrites in that guild"""
+        return (await self._load_guild(guild)).get(command.id)
+
+    def on_permissions_update(
+        self, payload: discord.RawAppCommandPermissionsUpdateEvent
+    ) -> None:
+        overwrites = self.permissions.get(payload.guild.id)
+        if overwrites is None:
+            # Never fetched, the first lookup will get the full state anyway
+            return
+
+        if payload.permissions:
+            overwrites[payload.target_id] = frozenset(
+                p.target.id for p in payload.permissions
+            )
+        else:
+            overwrites.pop(payload.target_id, None)
+
+    def forget(self, guild: int) -> None:
+        self.permissions.pop(guild, None)
@@ -0,0 +1,51 @@
+import re
+import sqlite3
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    import asqlite
+
+# Applied in this order on every new pooled connection
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "wal",
+    "synchronous": "normal",  # still safe in WAL mode, fsyncs only on checkpoints
+    "mmap_size": 256 * 1024**2,
+    "cache_size": -64 * 1024,  # negative is in KiB, so 64MiB
+    "temp_store": "memory",
+    "busy_timeout": 5000,  # ms
+}
+
+PRAGMA_VALUE_REGEX = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def pragma_profile(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Merges the `database` section of config.json over the defaults"""
+    profile = dict(DEFAULT_PRAGMAS)
+    for pragma, value in (config or {}).get("pragmas", {}).items():
+        if pragma not in DEFAULT_PRAGMAS:
+            raise ValueError(f"Unsupported pragma in config: {pragma}")
+
+        # Pragmas can't be bound as parameters, only allow plain words and numbers
+        if not PRAGMA_VALUE_REGEX.match(str(value)):
+            raise ValueError(f"Invalid value for pragma {pragma}: {value!r}")
+
+        profile[pragma] = value
+    return profile
+
+
+def initializer(profile: Dict[str, Any]) -> Callable[[sqlite3.Connection], None]:
+    """Returns the `init` callback given to asqlite for every pooled connection"""
+
+    def init(conn: sqlite3.Connection) -> None:
+        for pragma, value in profile.items():
+            conn.execute(f"PRAGMA {pragma} = {value};")
+
+    return init
+
+
+async def effective_pragmas(conn: "asqlite.Connection") -> Dict[str, Any]:
+    """Reads back what SQLite actually applied, some values are capped at compile time"""
+    return {
+        pragma: (await conn.fetchone(f"PRAGMA {pragma};"))[0]
+        for pragma in DEFAULT_PRAGMAS
+    }
@@ -36,3 +36,25 @@ class NotYourButton(app_commands.AppCommandError):
 class ModuleDisabled(commands.CommandError):
     def __init__(self, module: "Cog") -> None:
         self.module = module.qualified_name
+
+
+class InsufficientFunds(commands.CommandError):
+    def __init__(self, account: int, amount: int) -> None:
+        self.account = account
+        self.amount = amount
+
+
+class EvalUnavailable(commands.CommandError):
+    def __init__(self, backend: str) -> None:
+        self.backend = backend
+
+
+class EvalRejected(commands.CommandError):
+    def __init__(self, backend: str, reason: str) -> None:
+        self.backend = backend
+        self.reason = reason
+
+
+class TooManyEvals(commands.CommandError):
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
@@ -0,0 +1,80 @@
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    import asqlite
+
+
+class GuildConfig:
+    """Write-through cache of the guildConfig table
+
+    A guild's rows are loaded on first access and kept in memory,
+    every write goes to the database first then updates the cache
+    while holding that guild's lock so readers never see a half-applied change."""
+
+    def __init__(self, pool: "asqlite.Pool") -> None:
+        self.pool = pool
+        self._cache: Dict[int, Dict[str, Any]] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    def _lock(self, guild: int) -> asyncio.Lock:
+        return self._locks.setdefault(guild, asyncio.Lock())
+
+    async def _load(self, guild: int) -> Dict[str, Any]:
+        config = self._cache.get(guild)
+        if config is not None:
+            return config
+
+        async with self._lock(guild):
+            # Another task may have loaded it while we waited
+            if guild in self._cache:
+                return self._cache[guild]
+
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetchall(
+                    "SELECT key, value FROM guildConfig WHERE id = ?;", (guild,)
+                )
+            config = self._cache[guild] = {row[0]: row[1] for row in rows}
+            return config
+
+    async def get(self, guild: int, key: str, default: Any = None) -> Any:
+        return (await self._load(guild)).get(key, default)
+
+    async def module(self, guild: int, module: str) -> Dict[str, Any]:
+        """Returns a copy of every stored setting for the given module"""
+        prefix = module + ":"
+        return {
+            key[len(prefix) :]: value
+            for key, value in (await self._load(guild)).items()
+            if key.startswith(prefix)
+        }
+
+    async def set(self, guild: int, key: str, value: Any) -> None:
+        """Writes a setting, a value of `None` deletes it"""
+        await self._load(guild)
+        async with self._lock(guild):
+            async with self.pool.acquire() as conn:
+                if value is None:
+                    await conn.execute(
+                        "DELETE FROM guildConfig WHERE id = ? AND key = ?;",
+                        (guild, key),
+                    )
+                else:
+                    await conn.execute(
+                        "INSERT INTO guildConfig (id, key, value) VALUES (:id, :key, :value) ON CONFLICT(id, key) DO UPDATE SET value = :value;",
+                        {"id": guild, "key": key, "value": value},
+                    )
+
+            config = self._cache.get(guild)
+            if config is not None:
+                if value is None:
+                    config.pop(key, None)
+                else:
+                    config[key] = value
+
+    def invalidate(self, guild: Optional[int] = None) -> None:
+        """Drops a guild from the cache, or every guild if none is given"""
+        if guild is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(guild, None)
@@ -0,0 +1,108 @@
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+from typing import Any, Dict, Optional
+
+TEXT_FORMAT = "[{asctime}] [{levelname:<8}] {name}: {message}"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _compress(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class GzipRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler whose rotated files get gzipped by another thread"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._compressing: Optional[threading.Thread] = None
+
+    def rotation_filename(self, default_name: str) -> str:
+        return default_name + ".gz"
+
+    def doRollover(self) -> None:
+        # Backups get renamed during rollover, the previous one must be done by then
+        if self._compressing:
+            self._compressing.join()
+        super().doRollover()
+
+    def rotate(self, source: str, dest: str) -> None:
+        if not os.path.exists(source):
+            return
+
+        # A rename is instant, writing resumes to a fresh file right away
+        tmp = dest + ".tmp"
+        os.replace(source, tmp)
+        self._compressing = threading.Thread(
+            target=_compress, args=(tmp, dest), name="log-compressor", daemon=True
+        )
+        self._compressing.start()
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc_info"] = record.exc_text
+        if record.stack_info:
+            data["stack_info"] = record.stack_info
+        return json.dumps(data, ensure_ascii=False)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Like the default, but the traceback stays apart for the file formatter
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup(
+    logger: logging.Logger, config: Optional[Dict[str, Any]] = None
+) -> logging.handlers.QueueListener:
+    """Logs to a file through a queue, so the event loop never waits on the disk
+
+    Reads the `logging` section of config.json, returns the started listener
+    which has to be stopped on shutdown to flush what is left."""
+    config = config or {}
+
+    handler = GzipRotatingFileHandler(
+        filename=config.get("file", "discord.log"),
+        encoding="utf-8",
+        maxBytes=config.get("max_bytes", 32 * 1024**2),
+        backupCount=config.get("backups", 5),
+    )
+    if config.get("format", "text") == "json":
+        handler.setFormatter(JSONFormatter(datefmt=DATE_FORMAT))
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT, DATE_FORMAT, style="{"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(
+        log_queue, handler, respect_handler_level=True
+    )
+    listener.start()
+    return listener
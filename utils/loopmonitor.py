@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, List, Optional
+
+from utils.metrics import Histogram
+
+LOGGER = logging.getLogger("discord")
+
+
+class SlowCallback:
+    """A stretch of time the loop spent without getting back to us"""
+
+    __slots__ = ("beat", "when", "duration", "task", "stack")
+
+    def __init__(self, beat: float, task: str, stack: List[str]) -> None:
+        self.beat = beat
+        self.when = time.time()
+        self.duration = 0.0  # in ms, known once the loop is back
+        self.task = task
+        self.stack = stack
+
+
+class LoopMonitor:
+    """Measures how late the event loop wakes up and catches what blocks it
+
+    A task sleeps `interval` seconds over and over, anything over that is lag.
+    A watchdog thread notices when that task has been late for more than
+    `threshold` seconds, then grabs what the loop thread is running."""
+
+    def __init__(
+        self,
+        interval: float = 0.25,
+        threshold: float = 0.25,
+        history: int = 1200,
+        keep: int = 20,
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+
+        # Lag in ms, since startup and for the last `history` samples
+        self.lag = Histogram()
+        self.recent: Deque[float] = deque(maxlen=history)
+        self.slow: Deque[SlowCallback] = deque(maxlen=keep)
+        self.blocked = 0
+
+        self._beat = time.perf_counter()
+        self._pending: Optional[SlowCallback] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._task = self._loop.create_task(self._run(), name="loop-monitor")
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._task:
+            self._task.cancel()
+
+    def percentile(self, p: float) -> float:
+        """`p`th percentile of the recent lag, in ms"""
+        if not self.recent:
+            return 0.0
+        samples = sorted(self.recent)
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - start - self.interval) * 1000
+
+            beat, self._beat = self._beat, now
+            self.lag.record(lag)
+            self.recent.append(lag)
+
+            # Only a capture made while waiting on this very beat is about this lag
+            pending, self._pending = self._pending, None
+            if pending is not None and pending.beat == beat:
+                pending.duration = lag
+                self.slow.append(pending)
+                self.blocked += 1
+                LOGGER.warning(
+                    "Event loop blocked for %.0fms in %s\n%s",
+                    lag,
+                    pending.task,
+                    "".join(pending.stack),
+                )
+
+    def _watch(self) -> None:
+        captured = None
+        while not self._stopping.wait(self.threshold / 2):
+            beat = self._beat
+            if beat == captured:
+                continue
+            if time.perf_counter() - beat < self.interval + self.threshold:
+                continue
+
+            capture = self._capture(beat)
+            # The loop came back while we were looking, the stack is not the culprit
+            if capture is not None and self._beat == beat:
+                captured = beat
+                self._pending = capture
+
+    def _capture(self, beat: float) -> Optional[SlowCallback]:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return None
+
+        try:
+            stack = traceback.format_stack(frame, limit=15)
+            task = asyncio.current_task(self._loop)
+        except Exception:
+            # The loop thread keeps running while we walk its frames
+            return None
+
+        if task is not None:
+            coro = task.get_coro()
+            name = f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+        else:
+            name = "a callback outside of any task"
+        return SlowCallback(beat, name, stack)
@@ -0,0 +1,184 @@
+import bisect
+import contextlib
+import contextvars
+import json
+import math
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+if TYPE_CHECKING:
+    import asqlite
+
+# Bucket edges in ms, 4 per doubling from 50µs to about 50s
+BUCKETS: List[float] = [0.05 * 2 ** (i / 4) for i in range(81)]
+
+PHASES = ("total", "prepare", "db", "http")
+
+
+class Histogram:
+    """Log-bucketed latency histogram, percentiles are within ~10%"""
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self) -> None:
+        # The last bucket holds everything over the last edge
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, ms)] += 1
+        self.count += 1
+        self.sum += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p: float) -> float:
+        """Upper edge of the bucket holding the `p`th percentile (0-100)"""
+        if self.count == 0:
+            return 0.0
+
+        rank = math.ceil(self.count * p / 100)
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": {
+                f"{BUCKETS[i]:.3f}" if i < len(BUCKETS) else "inf": count
+                for i, count in enumerate(self.counts)
+                if count
+            },
+        }
+
+
+class Timing:
+    """What one command invocation spent, in seconds"""
+
+    __slots__ = ("start", "prepared", "db", "http")
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.prepared: Optional[float] = None
+        self.db = 0.0
+        self.http = 0.0
+
+
+# The invocation the running code belongs to, tasks it spawns inherit it
+current: contextvars.ContextVar[Optional[Timing]] = contextvars.ContextVar(
+    "timing", default=None
+)
+
+
+def add(phase: str, seconds: float) -> None:
+    """Adds time spent in `db` or `http` to the current invocation, if any"""
+    timing = current.get()
+    if timing is not None:
+        setattr(timing, phase, getattr(timing, phase) + seconds)
+
+
+def mark_prepared() -> None:
+    timing = current.get()
+    if timing is not None and timing.prepared is None:
+        timing.prepared = time.perf_counter()
+
+
+class TimedPool:
+    """Wraps an asqlite pool, time holding a connection counts as DB time"""
+
+    def __init__(self, pool: "asqlite.Pool") -> None:
+        self._pool = pool
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, *args, **kwargs) -> AsyncIterator["asqlite.Connection"]:
+        start = time.perf_counter()
+        try:
+            async with self._pool.acquire(*args, **kwargs) as conn:
+                yield conn
+        finally:
+            add("db", time.perf_counter() - start)
+
+
+def trace_config() -> aiohttp.TraceConfig:
+    """Counts outbound requests as HTTP time, for our session and discord.py's"""
+
+    async def on_request_start(
+        session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any
+    ) -> None:
+        ctx.start = time.perf_counter()
+
+    async def on_request_end(
+        session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any
+    ) -> None:
+        add("http", time.perf_counter() - ctx.start)
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_end)
+    return trace
+
+
+class CommandMetrics:
+    """Latency histograms per command and phase, plus failure counts
+
+    prepare is checks, argument parsing and before invoke hooks"""
+
+    def __init__(self) -> None:
+        self.commands: Dict[str, Dict[str, Histogram]] = {}
+        self.failures: Dict[str, int] = {}
+        self.since = time.time()
+
+    def record(self, command: str, timing: Timing, failed: bool = False) -> None:
+        end = time.perf_counter()
+        phases = self.commands.get(command)
+        if phases is None:
+            phases = self.commands[command] = {phase: Histogram() for phase in PHASES}
+
+        phases["total"].record((end - timing.start) * 1000)
+        # Commands failing their checks never get past prepare
+        phases["prepare"].record(((timing.prepared or end) - timing.start) * 1000)
+        phases["db"].record(timing.db * 1000)
+        phases["http"].record(timing.http * 1000)
+        if failed:
+            self.failures[command] = self.failures.get(command, 0) + 1
+
+    def reset(self) -> None:
+        self.commands.clear()
+        self.failures.clear()
+        self.since = time.time()
+
+    def export(self, path: str) -> None:
+        data = {
+            "since": self.since,
+            "exported": time.time(),
+            "commands": {
+                command: {
+                    "failures": self.failures.get(command, 0),
+                    **{phase: h.to_dict() for phase, h in phases.items()},
+                }
+                for command, phases in self.commands.items()
+            },
+        }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
@@ -0,0 +1,63 @@
+import logging
+import pathlib
+import re
+import time
+from typing import TYPE_CHECKING, List, Tuple
+
+if TYPE_CHECKING:
+    import asqlite
+
+LOGGER = logging.getLogger("discord")
+
+directory = pathlib.Path(__file__).parent.parent / "migrations"
+
+MIGRATION_REGEX = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+def discover() -> List[Tuple[int, str, pathlib.Path]]:
+    """Finds every `<version>_<name>.sql` file, sorted by version"""
+    migrations = []
+    for file in directory.iterdir():
+        match = MIGRATION_REGEX.match(file.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), file))
+
+    migrations.sort(key=lambda m: m[0])
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Two migrations share the same version number")
+    return migrations
+
+
+async def migrate(conn: "asqlite.Connection") -> List[str]:
+    """Applies every pending migration, each one in its own transaction
+
+    Returns the names of the migrations that were applied"""
+    await conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at INTEGER NOT NULL);"
+    )
+    current = (await conn.fetchone("SELECT max(version) FROM schema_version;"))[0] or 0
+
+    applied = []
+    for version, name, file in discover():
+        if version <= current:
+            continue
+
+        # executescript does not take parameters, name only holds \w characters
+        script = (
+            "BEGIN;\n"
+            + file.read_text(encoding="utf-8")
+            + f"\nINSERT INTO schema_version (version, name, applied_at) VALUES ({version}, '{name}', {int(time.time())});"
+            + "\nCOMMIT;"
+        )
+        try:
+            await conn.executescript(script)
+        except Exception:
+            await conn.rollback()
+            LOGGER.error("Migration %03d_%s failed, rolled back", version, name)
+            raise
+
+        LOGGER.info("Applied migration %03d_%s", version, name)
+        applied.append(f"{version:03d}_{name}")
+
+    return applied
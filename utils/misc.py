@@ -6,7 +6,6 @@ import unicodedata
 from typing import TYPE_CHECKING, Sequence, cast, Final
 
 import discord
-import requests
 from discord.ext import commands
 
 from cogs import EXTENSIONS
@@ -154,11 +153,3 @@ def clean_string(string: str) -> str:
     return unicodedata.normalize("NFD", string.casefold().replace(",", "")).encode(
         "ASCII", "ignore"
     )
-
-
-runtimes: list[dict] = requests.get("https://emkc.org/api/v2/piston/runtimes").json()
-literal_runtimes = set()
-for r in runtimes:
-    literal_runtimes.add(r["language"])
-    for alias in r["aliases"]:
-        literal_runtimes.add(alias)
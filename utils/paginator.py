@@ -1,13 +1,48 @@
+import itertools
+from collections import OrderedDict
 from copy import copy
-from typing import Optional
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional, Union
 
 import discord
 from discord.ext import commands
 
 from . import errors, misc
 
+Lines = Union[Iterable[str], AsyncIterable[str]]
+
+# Rendered pages kept around when they can be rendered again
+PAGES_CACHE_SIZE = 8
+
+
+class TextLines:
+    """Like str.split("\\n") but one line at a time, as many times as needed"""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def __iter__(self) -> Iterator[str]:
+        text, start = self.text, 0
+        while (end := text.find("\n", start)) != -1:
+            yield text[start:end]
+            start = end + 1
+        yield text[start:]
+
+
+def split_lines(text: str) -> TextLines:
+    return TextLines(text)
+
 
 class Paginator(discord.ui.View):
+    """Pages of lines, either added up front with `add_line` or pulled
+    from `lines` as users navigate
+
+    Only where each page starts and the last few rendered pages are kept
+    when `lines` can be iterated again (a list, `split_lines`...), other
+    pages are read again from it. A plain iterator or async iterator can
+    not go back, so every page read from one stays in memory."""
+
     def __init__(
         self,
         ctx: commands.Context,
@@ -17,6 +52,7 @@ class Paginator(discord.ui.View):
         prefix: str = "",
         suffix: str = "",
         timeout: Optional[float] = 180.0,
+        lines: Optional[Lines] = None,
     ) -> None:
         super().__init__(timeout=timeout)
 
@@ -26,14 +62,40 @@ class Paginator(discord.ui.View):
         self.ctx = ctx
         self.author = ctx.author
 
-        self.pages: list[str] = []
+        # Establish max
+        if self.embed:
+            if self.embed.description:
+                self.max_chars = 1024
+            else:
+                self.max_chars = 2048
+        else:
+            self.max_chars = 2000
+
+        # Rendered pages by index, least recently shown first
+        self.pages: OrderedDict[int, str] = OrderedDict()
+        # First line of each page, and how many lines were read
+        self._starts: list[int] = []
+        self._line = 0
         self.current_page: list[str] = []
+        # len("\n".join(self.current_page)) without joining every time
+        self._length = 0
+
+        # Where the rest of the lines come from, None once exhausted
+        self._source: Optional[Union[Iterator[str], AsyncIterator[str]]] = None
+        # What evicted pages are read again from, None if it can not be
+        self._lines: Optional[Lines] = None
+        if isinstance(lines, AsyncIterable):
+            self._source = aiter(lines)
+        elif lines is not None:
+            self._source = iter(lines)
+        if self._source is not None and self._source is not lines:
+            self._lines = lines
 
         self.subtitle = subtitle
         self.prefix = prefix
         self.suffix = suffix
 
-        self.quit_button.label = f"Quit • Page 1/{len(self.pages)}"
+        self.quit_button.label = "Quit • Page 1/?"
 
     async def interaction_check(
         self, interaction: discord.Interaction[discord.Client]
@@ -42,60 +104,124 @@ class Paginator(discord.ui.View):
             raise errors.NotYourButton
         return True
 
-    def _update_embed(self, embed: discord.Embed) -> discord.Embed:
+    @property
+    def page_count(self) -> Optional[int]:
+        """None until every line has been read"""
+        return len(self._starts) if self._source is None else None
+
+    def _page_label(self) -> str:
+        count = self.page_count
+        return f"{self.index+1}/{count if count is not None else '?'}"
+
+    def _update_embed(self, embed: discord.Embed, page: str) -> discord.Embed:
         if self.embed.description:
             if getattr(self, "_added_field", False):
                 embed.set_field_at(
                     index=len(embed.fields) - 1,
                     name=self.subtitle,
-                    value=self.pages[self.index],
+                    value=page,
                 )
             else:
-                embed.add_field(name=self.subtitle, value=self.pages[self.index])
+                embed.add_field(name=self.subtitle, value=page)
                 self._added_field = True
         else:
-            embed.description = self.pages[self.index]
+            embed.description = page
 
+        label = self._page_label().replace("/", " of ")
         if self.embed.footer:
             embed.set_footer(
-                text=f"{self.embed.footer.text} • Page {self.index+1} of {len(self.pages)}",
+                text=f"{self.embed.footer.text} • Page {label}",
                 icon_url=self.embed.footer.icon_url,
             )
         else:
-            embed.set_footer(text=f"Page {self.index+1} of {len(self.pages)}")
+            embed.set_footer(text=f"Page {label}")
         return embed
 
     def add_line(self, line: str = "") -> None:
-        # Establish max
-        if self.embed:
-            if self.embed.description:
-                MAX = 1024
-            else:
-                MAX = 2048
-        else:
-            MAX = 2000
-
         # If too many lines or too many characters, add page
-        if (
-            len("\n".join(self.current_page)) + len(line + self.prefix + self.suffix)
-            > MAX - 1
+        if self.current_page and (
+            self._length + len(line + self.prefix + self.suffix) > self.max_chars - 1
             or len(self.current_page) + 1 > self.max_lines
         ):
-            self.add_page("\n".join(self.current_page))
+            self.add_page()
 
+        self._length += len(line) + (1 if self.current_page else 0)
         self.current_page.append(line)
+        self._line += 1
 
     def add_page(self, page: str | None = None) -> None:
-        self.pages.append(
-            self.prefix + (page or "\n".join(self.current_page)) + self.suffix
+        index = len(self._starts)
+        self._starts.append(self._line - len(self.current_page))
+        self._store(
+            index, self.prefix + (page or "\n".join(self.current_page)) + self.suffix
         )
         self.current_page = []
+        self._length = 0
+
+    def _store(self, index: int, page: str) -> None:
+        self.pages[index] = page
+        self.pages.move_to_end(index)
+        if self._lines is not None and len(self.pages) > PAGES_CACHE_SIZE:
+            self.pages.popitem(last=False)
+
+    async def _render(self, index: int) -> str:
+        """Reads page `index` again, its lines are known to be complete"""
+        start = self._starts[index]
+        assert self._lines is not None
+        if index + 1 < len(self._starts):
+            end = self._starts[index + 1]
+        else:
+            end = self._line - len(self.current_page)
+
+        if isinstance(self._lines, AsyncIterable):
+            lines, position = [], 0
+            async for line in self._lines:
+                if position >= end:
+                    break
+                if position >= start:
+                    lines.append(line)
+                position += 1
+        else:
+            lines = list(itertools.islice(self._lines, start, end))
+        return self.prefix + "\n".join(lines) + self.suffix
+
+    async def _fill(self, index: Optional[int] = None) -> None:
+        """Reads lines until page `index` is complete, or all of them"""
+        while self._source is not None and (
+            index is None or len(self._starts) <= index
+        ):
+            try:
+                if isinstance(self._source, AsyncIterator):
+                    line = await anext(self._source)
+                else:
+                    line = next(self._source)
+            except (StopIteration, StopAsyncIteration):
+                self._source = None
+                break
+            self.add_line(line)
+
+        # Whatever is left is the last page, there always is at least one
+        if self._source is None and (self.current_page or not self._starts):
+            self.add_page()
+
+    async def get_page(self, index: int) -> str:
+        await self._fill(index)
+        page = self.pages.get(index)
+        if page is None:
+            page = await self._render(index)
+        self._store(index, page)
+        return page
+
+    async def count_pages(self) -> int:
+        """Reads everything that is left if it has to, keeping only a few pages"""
+        await self._fill()
+        return len(self._starts)
 
     async def start(
         self,
         destination: Optional[discord.abc.Messageable] = None,
     ):
-        self.add_page()
+        page = await self.get_page(self.index)
         self._update_buttons()
 
         if destination:
@@ -108,10 +234,12 @@ class Paginator(discord.ui.View):
         if self.embed:
             embed = copy(self.embed)
             await respond(
-                embed=self._update_embed(embed), view=self, mention_author=False
+                embed=self._update_embed(embed, page),
+                view=self,
+                mention_author=False,
             )
         else:
-            await respond(self.pages[self.index], view=self, mention_author=False)
+            await respond(page, view=self, mention_author=False)
 
     @discord.ui.button(label="<<", disabled=True)
     async def first_page(
@@ -153,29 +281,34 @@ class Paginator(discord.ui.View):
     async def last_page(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ):
-        self.index = len(self.pages) - 1
+        self.index = await self.count_pages() - 1
         await self.update_page(interaction)
 
     def _update_buttons(self):
         """Method to disable/enable buttons and update the page count"""
+        count = self.page_count
         self.first_page.disabled = self.previous_page.disabled = (
             self.index == 0
         )  # disabled first two button when first page is open
         self.last_page.disabled = self.next_page.disabled = (
-            self.index == len(self.pages) - 1
-        )  # disable last two button if last page is open
+            count is not None and self.index >= count - 1
+        )  # disable last two button if last page is open, unknown count means more
 
-        self.quit_button.label = f"Quit • Page {self.index+1}/{len(self.pages)}"  # update page count on quit button
+        self.quit_button.label = f"Quit • Page {self._page_label()}"  # update page count on quit button
 
     async def update_page(self, interaction: discord.Interaction) -> None:
+        # The count may have changed under us, pages can come from something live
+        count = self.page_count
+        if count is not None:
+            self.index = max(0, min(self.index, count - 1))
+
+        page = await self.get_page(self.index)
         self._update_buttons()
         assert interaction.message is not None
         if self.embed:
-            embed = interaction.message.embeds[0]    
+            embed = interaction.message.embeds[0]
             await interaction.response.edit_message(
-                embed=self._update_embed(embed), view=self
+                embed=self._update_embed(embed, page), view=self
             )
         else:
-            await interaction.response.edit_message(
-                content=self.pages[self.index], view=self
-            )
+            await interaction.response.edit_message(content=page, view=self)
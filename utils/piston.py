@@ -0,0 +1,273 @@
+import abc
+import asyncio
+import json
+import logging
+import pathlib
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from utils import errors
+from utils.metrics import Histogram
+
+LOGGER = logging.getLogger("discord")
+
+RUNTIMES_URL = "https://emkc.org/api/v2/piston/runtimes"
+EXECUTE_URL = "https://emkc.org/api/v2/piston/execute"
+
+directory = pathlib.Path(__file__).parent.parent / "cache"
+
+
+class Runtimes:
+    """Catalogue of the runtimes Piston offers
+
+    The last snapshot on disk is served right away at boot, it is
+    refreshed in the background on the shared session once older than `ttl`."""
+
+    def __init__(
+        self,
+        ttl: float = 6 * 3600,
+        path: pathlib.Path = directory / "piston_runtimes.json",
+    ) -> None:
+        self.ttl = ttl
+        self.path = path
+        self.runtimes: List[dict] = []
+        # alias or language -> runtime
+        self.aliases: Dict[str, dict] = {}
+        self.fetched_at: float = 0.0
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _update(self, runtimes: List[dict], fetched_at: float) -> None:
+        aliases = {}
+        for r in runtimes:
+            for alias in (r["language"], *r["aliases"]):
+                # First one wins, same as the old linear search
+                aliases.setdefault(alias.casefold(), r)
+
+        self.runtimes = runtimes
+        self.aliases = aliases
+        self.fetched_at = fetched_at
+
+    def _read_snapshot(self) -> Optional[List[dict]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_snapshot(self, runtimes: List[dict]) -> None:
+        self.path.parent.mkdir(exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(runtimes, file)
+        tmp.replace(self.path)
+
+    async def load(self, session: aiohttp.ClientSession) -> None:
+        """Serves the disk snapshot, then refreshes in the background if stale"""
+        self.session = session
+        runtimes = await asyncio.to_thread(self._read_snapshot)
+        if runtimes is not None:
+            self._update(runtimes, self.path.stat().st_mtime)
+            LOGGER.info("Loaded %d Piston runtimes from snapshot", len(runtimes))
+        self.ensure_fresh()
+
+    async def refresh(self) -> None:
+        assert self.session is not None
+        async with self.session.get(
+            RUNTIMES_URL, timeout=aiohttp.ClientTimeout(total=10)
+        ) as resp:
+            resp.raise_for_status()
+            runtimes: List[dict] = await resp.json()
+
+        self._update(runtimes, time.time())
+        await asyncio.to_thread(self._write_snapshot, runtimes)
+
+    async def _refresh_quietly(self) -> None:
+        try:
+            await self.refresh()
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+            LOGGER.warning("Failed to refresh Piston runtimes", exc_info=1)
+
+    def ensure_fresh(self) -> Optional[asyncio.Task]:
+        """Starts a background refresh when the catalogue is stale, never waits on it"""
+        if self._task and not self._task.done():
+            return self._task
+
+        if time.time() - self.fetched_at > self.ttl and self.session:
+            self._task = asyncio.create_task(self._refresh_quietly())
+        return self._task
+
+    async def get(self, alias: str) -> Optional[dict]:
+        """Finds a runtime by language or alias
+
+        Only waits on the network when no catalogue was ever loaded"""
+        task = self.ensure_fresh()
+        if not self.aliases and task:
+            await task
+        return self.aliases.get(alias.casefold())
+
+
+class Backend(abc.ABC):
+    """Somewhere eval can run code
+
+    Runtimes look like Piston's, `language`, `version` and `aliases`,
+    and so do results, `output`, `code` and `signal`."""
+
+    name = ""
+    # Whether anyone may run code on it, or only the owner
+    public = True
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def languages(self) -> List[dict]: ...
+
+    @abc.abstractmethod
+    async def get(self, alias: str) -> Optional[dict]: ...
+
+    @abc.abstractmethod
+    async def run(self, language: str, version: str, code: str) -> dict: ...
+
+
+class PistonBackend(Backend):
+    """The public Piston API"""
+
+    name = "piston"
+
+    def __init__(
+        self, session: aiohttp.ClientSession, timeout: float = 15, retries: int = 2
+    ) -> None:
+        self.session = session
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.runtimes = Runtimes()
+
+    async def start(self) -> None:
+        await self.runtimes.load(self.session)
+
+    def languages(self) -> List[dict]:
+        self.runtimes.ensure_fresh()
+        return self.runtimes.runtimes
+
+    async def get(self, alias: str) -> Optional[dict]:
+        return await self.runtimes.get(alias)
+
+    async def run(self, language: str, version: str, code: str) -> dict:
+        payload = {
+            "language": language,
+            "version": version,
+            "files": [{"content": code}],
+        }
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # Exponential backoff with jitter so retries do not line up
+                await asyncio.sleep(0.5 * 2**attempt * random.uniform(0.5, 1.5))
+
+            try:
+                async with self.session.post(
+                    EXECUTE_URL, json=payload, timeout=self.timeout
+                ) as resp:
+                    # Rate limited or upstream trouble, worth another try
+                    if resp.status == 429 or resp.status >= 500:
+                        LOGGER.warning("Piston answered %d", resp.status)
+                        continue
+                    if resp.status >= 400:
+                        # Our request is at fault, trying again will not help
+                        raise errors.EvalRejected(self.name, await self._reason(resp))
+                    return (await resp.json())["run"]
+
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                LOGGER.warning("Piston request failed", exc_info=1)
+
+        raise errors.EvalUnavailable(self.name)
+
+    async def _reason(self, resp: aiohttp.ClientResponse) -> str:
+        try:
+            return (await resp.json())["message"]
+        except (aiohttp.ClientError, ValueError, KeyError, TypeError):
+            return resp.reason or str(resp.status)
+
+
+class Executor:
+    """Runs eval code on a backend without letting anyone hog it
+
+    At most `concurrency` runs happen at once, each user's runs go one
+    after the other and no more than `per_user` of them may wait.
+    Finished runs are cached by (language, version, code)."""
+
+    def __init__(
+        self,
+        backend: Backend,
+        concurrency: int = 4,
+        per_user: int = 3,
+        cache_size: int = 256,
+    ) -> None:
+        self.backend = backend
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.per_user = per_user
+        self.cache_size = cache_size
+        self.cache: OrderedDict[Tuple[str, str, str], dict] = OrderedDict()
+
+        # user id -> lock, and how many runs are waiting on it
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._waiting: Dict[int, int] = {}
+
+        # In ms, from the command to getting a slot and for the run itself
+        self.queue_wait = Histogram()
+        self.execution = Histogram()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key: Tuple[str, str, str]) -> Optional[dict]:
+        run = self.cache.get(key)
+        if run is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+        return run
+
+    async def execute(self, user: int, language: str, version: str, code: str) -> dict:
+        """Output, exit code and signal of the run"""
+        key = (language, version, code)
+        run = self._cached(key)
+        if run is not None:
+            return run
+
+        waiting = self._waiting.get(user, 0)
+        if waiting >= self.per_user:
+            raise errors.TooManyEvals(self.per_user)
+
+        self._waiting[user] = waiting + 1
+        lock = self._locks.setdefault(user, asyncio.Lock())
+        start = time.perf_counter()
+        try:
+            async with lock, self.semaphore:
+                self.queue_wait.record((time.perf_counter() - start) * 1000)
+                # The same code may have run while we were waiting
+                run = self._cached(key)
+                if run is not None:
+                    return run
+
+                self.misses += 1
+                start = time.perf_counter()
+                run = await self.backend.run(language, version, code)
+                self.execution.record((time.perf_counter() - start) * 1000)
+        finally:
+            self._waiting[user] -= 1
+            if not self._waiting[user]:
+                del self._waiting[user]
+                del self._locks[user]
+
+        # Killed or timed out runs may well succeed the next time
+        if run.get("signal") is None:
+            self.cache[key] = run
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return run
@@ -0,0 +1,361 @@
+import asyncio
+import logging
+import os
+import pathlib
+import platform
+import re
+import shutil
+import signal
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from utils import errors
+from utils.piston import Backend
+
+LOGGER = logging.getLogger("discord")
+
+# language -> aliases, command reading the program from stdin
+INTERPRETERS: Dict[str, Tuple[Tuple[str, ...], List[str]]] = {
+    "python": (("py", "py3", "python3"), [sys.executable, "-I", "-"]),
+    "javascript": (("js", "node", "node-js"), ["node", "-"]),
+    "ruby": (("rb",), ["ruby", "-"]),
+    "bash": (("sh",), ["bash", "-s"]),
+    "perl": (("pl",), ["perl", "-"]),
+    "lua": ((), ["lua", "-"]),
+    "php": ((), ["php"]),
+}
+
+# Sets the limits then becomes the interpreter, they stick across exec
+LAUNCHER = """
+import os, resource, sys
+memory, cpu, size, nproc = map(int, sys.argv[1:5])
+# RLIMIT_NPROC counts every process of the user, so it goes on top of those
+uid, running = os.getuid(), 0
+for pid in os.listdir("/proc"):
+    try:
+        if pid.isdigit() and os.stat(f"/proc/{pid}").st_uid == uid:
+            running += len(os.listdir(f"/proc/{pid}/task"))
+    except OSError:
+        pass
+for limit, value in (
+    (resource.RLIMIT_DATA, memory),
+    (resource.RLIMIT_CPU, cpu),
+    (resource.RLIMIT_FSIZE, size),
+    (resource.RLIMIT_NOFILE, 64),
+    (resource.RLIMIT_CORE, 0),
+    (resource.RLIMIT_NPROC, running + nproc),
+):
+    hard = resource.getrlimit(limit)[1]
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    resource.setrlimit(limit, (value, value))
+os.execvp(sys.argv[5], sys.argv[5:])
+"""
+
+# Read-only inside bwrap, along with the prefixes the interpreters live in
+SYSTEM_PATHS = (
+    "/usr",
+    "/bin",
+    "/sbin",
+    "/lib",
+    "/lib32",
+    "/lib64",
+    "/etc/alternatives",
+    "/etc/ssl",
+)
+
+root = pathlib.Path(__file__).parent.parent.resolve()
+
+VERSION_REGEX = re.compile(r"\d+(?:\.\d+)+")
+
+
+class Worker:
+    """An interpreter already started, waiting for its program on stdin"""
+
+    __slots__ = ("process", "directory")
+
+    def __init__(self, process: asyncio.subprocess.Process, directory: str) -> None:
+        self.process = process
+        self.directory = directory
+
+    def kill(self) -> None:
+        # The whole session, background children included
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def discard(self) -> None:
+        self.kill()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class LocalBackend(Backend):
+    """Runs code on this machine, for whatever interpreters it has
+
+    Every run gets a fresh process in a throwaway directory, with
+    memory, CPU time, file size, open files and processes limited, plus
+    a wall clock timeout and an output cap. Processes for the `warm`
+    languages are started ahead of time so runs skip the interpreter startup.
+
+    Only bubblewrap isolates the code from the host (filesystem, network,
+    other processes), without it the backend is reserved to the owner."""
+
+    name = "local"
+
+    def __init__(
+        self,
+        warm: Optional[List[str]] = None,
+        processes: int = 2,
+        timeout: float = 5,
+        memory: int = 512,
+        cpu: int = 5,
+        output: int = 16 * 1024,
+        nproc: int = 32,
+        isolation: str = "auto",
+    ) -> None:
+        if isolation == "auto":
+            isolation = "bwrap" if shutil.which("bwrap") else "none"
+        self.isolation = isolation
+        self.public = isolation == "bwrap"
+
+        self.warm = warm if warm is not None else ["python"]
+        self.processes = processes
+        self.timeout = timeout
+        self.memory = memory * 1024**2
+        self.cpu = cpu
+        self.output = output
+        self.nproc = nproc
+
+        self.runtimes: List[dict] = []
+        # alias or language -> runtime
+        self.aliases: Dict[str, dict] = {}
+        self.commands: Dict[str, List[str]] = {}
+        self.idle: Dict[str, List[Worker]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        for language, (aliases, command) in INTERPRETERS.items():
+            path = shutil.which(command[0])
+            if path is None:
+                continue
+
+            runtime = {
+                "language": language,
+                "version": await self._version(path, language),
+                "aliases": list(aliases),
+            }
+            self.runtimes.append(runtime)
+            self.commands[language] = [os.path.realpath(path), *command[1:]]
+            for alias in (language, *aliases):
+                self.aliases.setdefault(alias, runtime)
+
+        LOGGER.info(
+            "Local eval backend runs %s",
+            ", ".join(r["language"] for r in self.runtimes),
+        )
+        if not self.public:
+            LOGGER.warning("Local eval is not isolated, only the owner may use it")
+        for language in self.warm:
+            if language in self.commands:
+                self.idle[language] = []
+                for _ in range(self.processes):
+                    self._replenish(language)
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for workers in self.idle.values():
+            for worker in workers:
+                worker.discard()
+        self.idle.clear()
+
+    def languages(self) -> List[dict]:
+        return self.runtimes
+
+    async def get(self, alias: str) -> Optional[dict]:
+        return self.aliases.get(alias.casefold())
+
+    async def _version(self, path: str, language: str) -> str:
+        if language == "python":
+            return platform.python_version()
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                path,
+                "--version",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+            out, _ = await asyncio.wait_for(process.communicate(), timeout=5)
+        except (OSError, asyncio.TimeoutError):
+            return "unknown"
+        match = VERSION_REGEX.search(out.decode(errors="replace"))
+        return match.group() if match else "unknown"
+
+    def _bwrap(self, directory: str) -> List[str]:
+        prefixes = {os.path.realpath(sys.base_prefix)}
+        for command in (sys.executable, *(c[0] for c in self.commands.values())):
+            prefixes.add(str(pathlib.Path(os.path.realpath(command)).parent.parent))
+
+        binds = []
+        for path in (*SYSTEM_PATHS, *sorted(prefixes)):
+            # Never a prefix holding the bot itself, config.json is in there
+            if root.is_relative_to(path):
+                LOGGER.warning("Not exposing %s to eval, it contains the bot", path)
+                continue
+            binds += ["--ro-bind-try", path, path]
+
+        return [
+            "bwrap",
+            "--unshare-all",
+            "--die-with-parent",
+            "--new-session",
+            "--cap-drop",
+            "ALL",
+            "--uid",
+            "65534",
+            "--gid",
+            "65534",
+            *binds,
+            "--proc",
+            "/proc",
+            "--dev",
+            "/dev",
+            "--tmpfs",
+            "/tmp",
+            "--bind",
+            directory,
+            "/sandbox",
+            "--chdir",
+            "/sandbox",
+            "--",
+        ]
+
+    async def _spawn(self, language: str) -> Worker:
+        directory = tempfile.mkdtemp(prefix="eval-")
+        isolated = self.isolation == "bwrap"
+        home = "/sandbox" if isolated else directory
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *(self._bwrap(directory) if isolated else ()),
+                os.path.realpath(sys.executable),
+                "-I",
+                "-S",
+                "-c",
+                LAUNCHER,
+                str(self.memory),
+                str(self.cpu),
+                str(self.output),
+                str(self.nproc),
+                *self.commands[language],
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=directory,
+                env={
+                    "PATH": os.defpath,
+                    "HOME": home,
+                    "TMPDIR": home,
+                    "LANG": "C.UTF-8",
+                    "PYTHONDONTWRITEBYTECODE": "1",
+                },
+                # Its own process group, killed as a whole
+                start_new_session=True,
+            )
+        except OSError:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        return Worker(process, directory)
+
+    def _replenish(self, language: str) -> None:
+        async def spawn():
+            try:
+                self.idle[language].append(await self._spawn(language))
+            except OSError:
+                LOGGER.warning("Failed to start a %s worker", language, exc_info=1)
+
+        task = asyncio.create_task(spawn())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _worker(self, language: str) -> Worker:
+        idle = self.idle.get(language)
+        while idle:
+            worker = idle.pop()
+            self._replenish(language)
+            # Could have died while waiting, out of memory or whatever
+            if worker.process.returncode is None:
+                return worker
+            worker.discard()
+        return await self._spawn(language)
+
+    async def _read(self, stream: asyncio.StreamReader) -> Tuple[bytes, bool]:
+        output = bytearray()
+        while chunk := await stream.read(self.output + 1 - len(output)):
+            output += chunk
+            if len(output) > self.output:
+                return bytes(output[: self.output]), True
+        return bytes(output), False
+
+    async def _exited(self, process: asyncio.subprocess.Process) -> None:
+        # Process.wait also waits for the pipes, which background children can hold
+        while process.returncode is None:
+            await asyncio.sleep(0.01)
+
+    async def run(self, language: str, version: str, code: str) -> dict:
+        try:
+            worker = await self._worker(language)
+        except OSError:
+            LOGGER.warning("Failed to start a %s worker", language, exc_info=1)
+            raise errors.EvalUnavailable(self.name)
+
+        process = worker.process
+        assert process.stdin and process.stdout
+        loop = asyncio.get_running_loop()
+        # One deadline for the whole run, however it ends
+        deadline = loop.time() + self.timeout
+        left = lambda: max(0.0, deadline - loop.time())
+
+        reader = asyncio.create_task(self._read(process.stdout))
+        exited = asyncio.create_task(self._exited(process))
+        timed_out = False
+        try:
+            process.stdin.write(code.encode())
+            process.stdin.close()
+
+            done, _ = await asyncio.wait(
+                (reader, exited), timeout=left(), return_when=asyncio.FIRST_COMPLETED
+            )
+            if exited in done:
+                # Whatever it left running must not hold the output open
+                worker.kill()
+                done, _ = await asyncio.wait((reader,), timeout=left())
+                timed_out = not done
+            elif reader in done:
+                # Over the output cap, or it closed its output and may still run
+                if not reader.result()[1]:
+                    done, _ = await asyncio.wait((exited,), timeout=left())
+                    timed_out = not done
+            else:
+                timed_out = True
+        finally:
+            worker.discard()
+            reader.cancel()
+            await exited
+
+        if timed_out:
+            return {"output": "Timed out", "code": None, "signal": signal.SIGKILL.name}
+
+        output, truncated = reader.result()
+        text = output.decode(errors="replace")
+        if truncated:
+            text += "\n[output truncated]"
+        if process.returncode < 0 and not truncated:
+            return {
+                "output": text,
+                "code": None,
+                "signal": signal.Signals(-process.returncode).name,
+            }
+        return {"output": text, "code": process.returncode, "signal": None}
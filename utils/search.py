@@ -0,0 +1,130 @@
+import difflib
+import heapq
+from array import array
+from collections import Counter, defaultdict
+from typing import (
+    Callable,
+    DefaultDict,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+def ngrams(text: str, n: int = 3) -> set[str]:
+    """Distinct n-grams of a casefolded string, padded so short ones still have some"""
+    text = f" {text.casefold()} "
+    return {text[i : i + n] for i in range(max(len(text) - n + 1, 1))}
+
+
+class NgramIndex(Generic[T]):
+    """Fuzzy lookup over a fixed set of keys
+
+    Built once, every query then only looks at the keys sharing the most
+    n-grams with it (the shortlist) and scores those with difflib."""
+
+    def __init__(self, items: Iterable[Tuple[str, T]], n: int = 3) -> None:
+        self.n = n
+        self.keys: List[str] = []
+        self.folded: List[str] = []
+        self.values: List[T] = []
+        # How many distinct n-grams each key has, for the dice coefficient
+        self.sizes = array("I")
+
+        # n-gram -> ids of the keys containing it
+        postings: DefaultDict[str, List[int]] = defaultdict(list)
+        for i, (key, value) in enumerate(items):
+            grams = ngrams(key, n)
+            self.keys.append(key)
+            self.folded.append(key.casefold())
+            self.values.append(value)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(i)
+
+        # Plain lists of ints take about 4 times the memory
+        self.postings: Dict[str, array] = {
+            gram: array("I", ids) for gram, ids in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(
+        self,
+        query: str,
+        k: int = 8,
+        shortlist: int = 32,
+        predicate: Optional[Callable[[T], bool]] = None,
+        prune: bool = True,
+    ) -> List[Tuple[float, str, T]]:
+        """Returns up to `k` (score, key, value), best first
+
+        Small indexes can turn `prune` off so typos in short keys still match"""
+        grams = ngrams(query, self.n)
+        size = len(grams)
+        # N-grams no key has would pass for the rarest and crowd out the rest
+        grams = sorted(
+            (g for g in grams if g in self.postings),
+            key=lambda g: len(self.postings[g]),
+        )
+
+        # Any key sharing at least half of the query's n-grams contains one of
+        # the rarest half, so the long postings of common n-grams are skipped
+        if prune:
+            grams = grams[: len(grams) // 2 + 1]
+
+        counts: Counter[int] = Counter()
+        for gram in grams:
+            postings = self.postings.get(gram)
+            if postings:
+                counts.update(postings)
+
+        if predicate:
+            candidates = [i for i in counts if predicate(self.values[i])]
+        else:
+            candidates = list(counts)
+        if not candidates:
+            # Misspelled queries may only share common n-grams with what they meant
+            if prune:
+                return self.search(query, k, shortlist, predicate, prune=False)
+            return []
+        top = max(counts[i] for i in candidates)
+
+        # Keys sharing less than half as many n-grams as the best one can't win
+        floor = top / 2
+        best = heapq.nlargest(
+            shortlist,
+            [i for i in candidates if counts[i] >= floor],
+            key=lambda i: 2 * counts[i] / (size + self.sizes[i]),
+        )
+
+        # difflib caches details about the second sequence, so it holds the query
+        matcher = difflib.SequenceMatcher(None, b=query.casefold())
+        bounds = []
+        for i in best:
+            matcher.set_seq1(self.folded[i])
+            bounds.append((matcher.quick_ratio(), i))
+        bounds.sort(reverse=True)
+
+        # quick_ratio is an upper bound of ratio, stop once nothing left can beat top k
+        scored: List[Tuple[float, int]] = []
+        for bound, i in bounds:
+            if len(scored) == k and bound <= scored[0][0]:
+                break
+            matcher.set_seq1(self.folded[i])
+            if len(scored) < k:
+                heapq.heappush(scored, (matcher.ratio(), i))
+            else:
+                heapq.heappushpop(scored, (matcher.ratio(), i))
+
+        return [
+            (score, self.keys[i], self.values[i])
+            for score, i in sorted(scored, reverse=True)
+        ]
@@ -0,0 +1,131 @@
+import asyncio
+import contextlib
+import logging
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import asqlite
+
+LOGGER = logging.getLogger("discord")
+
+# Rollup row holding the totals across every guild
+GLOBAL = -1
+
+UPSERT = "INSERT INTO {table} (id, key, value) VALUES (?, ?, ?) ON CONFLICT(id, key) DO UPDATE SET value = value + excluded.value;"
+
+
+def rollup_key(key: str) -> Optional[str]:
+    """Which statistics_rollup total a counter contributes to, if any"""
+    if key.startswith("CMD_RAN:"):
+        return "CMD_RAN"
+    if key in ("SONG_PLAYED", "SONG_PLAYTIME"):
+        return key
+    return None
+
+
+class StatisticsWriter:
+    """Write-behind buffer for the statistics table
+
+    Counters are summed in memory as `(id, key) -> delta` and written
+    in a single transaction every `interval` seconds or as soon as
+    `threshold` distinct counters are pending, whichever comes first.
+    The statistics_rollup totals are updated in that same transaction."""
+
+    def __init__(
+        self,
+        pool: "asqlite.Pool",
+        interval: float = 30.0,
+        threshold: int = 256,
+    ) -> None:
+        self.pool = pool
+        self.interval = interval
+        self.threshold = threshold
+
+        self.pending: Dict[Tuple[int, str], int] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def increment(self, id: int, key: str, value: int = 1) -> None:
+        """Adds `value` to the counter, the write happens on the next flush"""
+        self.pending[(id, key)] = self.pending.get((id, key), 0) + value
+
+        if len(self.pending) >= self.threshold and not (
+            self._flush_task and not self._flush_task.done()
+        ):
+            self._flush_task = asyncio.create_task(self.flush())
+            self._flush_task.add_done_callback(self._flushed)
+
+    def _flushed(self, task: asyncio.Task) -> None:
+        # Nothing awaits the early flushes, their errors would go unnoticed
+        if not task.cancelled() and task.exception() is not None:
+            LOGGER.error("Failed to flush statistics", exc_info=task.exception())
+
+    def deltas(self, key: str) -> Dict[int, int]:
+        """Pending deltas of a key by id, not in the table yet"""
+        return {id: value for (id, k), value in self.pending.items() if k == key}
+
+    @contextlib.asynccontextmanager
+    async def paused(self) -> AsyncIterator[None]:
+        """Holds off flushes, so the table and `pending` add up meanwhile"""
+        async with self._lock:
+            yield
+
+    async def flush(self) -> None:
+        """Writes every pending counter in one transaction"""
+        async with self._lock:
+            if not self.pending:
+                return
+
+            pending, self.pending = self.pending, {}
+
+            rollups: Dict[Tuple[int, str], int] = {}
+            for (id, key), value in pending.items():
+                rkey = rollup_key(key)
+                if rkey:
+                    for scope in (id, GLOBAL):
+                        rollups[(scope, rkey)] = rollups.get((scope, rkey), 0) + value
+
+            try:
+                async with self.pool.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.executemany(
+                            UPSERT.format(table="statistics"),
+                            [(id, key, value) for (id, key), value in pending.items()],
+                        )
+                        await conn.executemany(
+                            UPSERT.format(table="statistics_rollup"),
+                            [(id, key, value) for (id, key), value in rollups.items()],
+                        )
+            except BaseException:
+                # Put the deltas back so they are retried on the next flush,
+                # cancellation included since the transaction was rolled back
+                for k, value in pending.items():
+                    self.pending[k] = self.pending.get(k, 0) + value
+                raise
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Shielded, closing while a write is in flight waits for it
+                await asyncio.shield(self.flush())
+            except Exception:
+                LOGGER.error("Failed to flush statistics", exc_info=1)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._flush_task:
+            with contextlib.suppress(Exception):
+                await self._flush_task
+            self._flush_task = None
+        # Waits on the lock for any flush still running, then writes the rest
+        await self.flush()
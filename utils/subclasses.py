@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any, Dict, Optional
 
 import discord
-from discord import Message, app_commands
+from discord import Message
 from discord.ext import commands
 
 from . import errors, misc, paginator
@@ -25,9 +25,13 @@ async def reply(
 ) -> Message:
     if ctx.interaction and ctx.interaction.response.is_done():
         if len(prefix + content + suffix) > 2000:
-            p = paginator.Paginator(ctx, prefix=prefix, suffix=suffix, max_lines=100)
-            for line in content.split("\n"):
-                p.add_line(line)
+            p = paginator.Paginator(
+                ctx,
+                prefix=prefix,
+                suffix=suffix,
+                max_lines=100,
+                lines=paginator.split_lines(content),
+            )
             return await p.start()
 
         return await ctx.interaction.followup.send(
@@ -35,9 +39,13 @@ async def reply(
         )
     else:
         if len(prefix + content + suffix) > 2000:
-            p = paginator.Paginator(ctx, prefix=prefix, suffix=suffix, max_lines=100)
-            for line in content.split("\n"):
-                p.add_line(line)
+            p = paginator.Paginator(
+                ctx,
+                prefix=prefix,
+                suffix=suffix,
+                max_lines=100,
+                lines=paginator.split_lines(content),
+            )
             return await p.start()
 
         return await ctx.reply(
@@ -48,23 +56,17 @@ async def reply(
 async def can_use(ctx: commands.Context):
     if ctx.guild and isinstance(ctx.author, discord.Member):
         if isinstance(ctx.command, commands.HybridCommand):
-            app_cmds: list[app_commands.AppCommand] = (
-                await ctx.bot.tree.fetch_commands()
-            )
-            for cmd in app_cmds:
-                if cmd.name == ctx.command.qualified_name:
-                    try:
-                        perms = await cmd.fetch_permissions(ctx.guild)
-                        targets = [p.target for p in perms.permissions]
-                        return any(
-                            [
-                                ctx.author in targets,
-                                any([r in targets for r in ctx.author.roles]),
-                                ctx.channel in targets,
-                            ]
-                        )
-                    except discord.NotFound:
-                        break
+            cmd = await ctx.bot.app_registry.get(ctx.command.qualified_name)
+            if cmd:
+                targets = await ctx.bot.app_registry.targets(ctx.guild.id, cmd)
+                if targets is not None:
+                    return any(
+                        [
+                            ctx.author.id in targets,
+                            any([r.id in targets for r in ctx.author.roles]),
+                            ctx.channel.id in targets,
+                        ]
+                    )
     return True
 
 
@@ -81,28 +83,25 @@ class Cog(commands.Cog):
         self.time: float = time.time()
         self.config: Dict[str, Setting] = {"disabled": Setting(bool, False)}
 
-    async def get_setting(
-        self, ctx: commands.Context, module: str, setting: str
-    ) -> Optional[str]:
-        assert ctx.guild is not None
-        async with self.bot.pool.acquire() as conn:
-            setting = await conn.fetchone(
-                "SELECT value FROM guildConfig WHERE id = ? AND key LIKE '?:?';",
-                (ctx.guild.id, module.casefold(), setting.upper()),
-            )
-            return setting[0] if setting else None
+    async def get_setting(self, guild: int, setting: str) -> Any:
+        value = await self.bot.guild_config.get(
+            guild, f"{self.qualified_name}:{setting}"
+        )
+        return value if value is not None else self.config[setting].default
+
+    async def set_setting(self, guild: int, setting: str, value: Any) -> None:
+        await self.bot.guild_config.set(
+            guild, f"{self.qualified_name}:{setting}", value
+        )
 
     async def cog_before_invoke(self, ctx: commands.Context) -> None:
         if ctx.guild is None:
             return await super().cog_before_invoke(ctx)
 
-        try:
-            if await commands.run_converters(
-                ctx, bool, await self.get_setting(ctx, "disabled"), commands.Parameter
-            ):
+        # The owner bypasses this so disabling Admin can't lock out `settings`
+        if await self.get_setting(ctx.guild.id, "disabled"):
+            if not await self.bot.is_owner(ctx.author):
                 raise errors.ModuleDisabled(self)
-        except:
-            pass
 
         assert isinstance(ctx.author, discord.Member)
         if await can_use(ctx) or ctx.author.guild_permissions.administrator:
@@ -0,0 +1,68 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from discord.ext import commands
+
+from utils.search import NgramIndex
+
+if TYPE_CHECKING:
+    from main import AceBot
+
+
+class CommandIndex:
+    """Did you mean lookups over command names and aliases
+
+    There is one index for the top level commands and one per group,
+    built on first use and dropped whenever an extension is (re)loaded or unloaded."""
+
+    def __init__(self, bot: "AceBot") -> None:
+        self.bot = bot
+        # group qualified name (None for top level) -> index
+        self._indexes: Dict[Optional[str], NgramIndex[commands.Command]] = {}
+
+    def invalidate(self) -> None:
+        self._indexes.clear()
+
+    def _index(self, parent: Optional[commands.Group]) -> NgramIndex[commands.Command]:
+        key = parent.qualified_name if parent else None
+        index = self._indexes.get(key)
+        if index is None:
+            cmds = parent.commands if parent else self.bot.commands
+            # Bigrams, command names are too short for trigrams to survive typos
+            index = self._indexes[key] = NgramIndex(
+                ((name, cmd) for cmd in cmds for name in (cmd.name, *cmd.aliases)), n=2
+            )
+        return index
+
+    def candidates(
+        self, query: str, parent: Optional[commands.Group] = None, k: int = 5
+    ) -> List[Tuple[float, commands.Command]]:
+        """Closest commands as (score, command), best first, without checks"""
+        results = []
+        seen = set()
+        # A few extra in case some of them are aliases of the same command
+        for score, _, cmd in self._index(parent).search(query, k=k * 2, prune=False):
+            if cmd not in seen:
+                seen.add(cmd)
+                results.append((score, cmd))
+        return results[:k]
+
+    async def suggest(
+        self,
+        ctx: commands.Context,
+        query: str,
+        parent: Optional[commands.Group] = None,
+        threshold: float = 0.5,
+        checks: int = 3,
+    ) -> Optional[commands.Command]:
+        """Best match above `threshold` the author can run
+
+        Only the `checks` best candidates go through can_run"""
+        for score, cmd in self.candidates(query, parent, k=checks):
+            if score <= threshold:
+                break
+            try:
+                if await cmd.can_run(ctx):
+                    return cmd
+            except commands.CommandError:
+                continue
+        return None